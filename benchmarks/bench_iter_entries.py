@@ -0,0 +1,66 @@
+"""
+Compare peak memory of decrypting the whole vault at once (get_all_entries)
+with streaming it through keyset pages (iter_entry_pages).
+
+Usage: python benchmarks/bench_iter_entries.py [--entries 100000] [--page-size 2000]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from ciphervault.core.database import SecurePasswordDatabase
+from ciphervault.core.encryption import HybridEncryptionManager
+
+
+def fill(db, manager, count):
+    with db.transaction():
+        for i in range(count):
+            service = f"service-{i % 500}"
+            plaintext = f"user{i}@example.com|{os.urandom(12).hex()}|note {i}".encode()
+            db.add_entry(manager.encrypt_record(plaintext, service.encode()),
+                         context=service, algorithm_mechanism=manager.algorithm)
+
+
+def whole_table(db, manager, page_size):
+    entries = db.get_all_entries()
+    return len(manager.decrypt_many((entry['record'], entry['service'].encode()) for entry in entries))
+
+
+def paged(db, manager, page_size):
+    count = 0
+    for page in db.iter_entry_pages(page_size):
+        count += len(manager.decrypt_many((entry['record'], entry['service'].encode()) for entry in page))
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    manager = HybridEncryptionManager.from_keys(os.urandom(32), os.urandom(32), "aes")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SecurePasswordDatabase(os.path.join(tmp, "bench.db"), os.urandom(32))
+        try:
+            fill(db, manager, args.entries)
+            print(f"{'path':>8} {'entries':>8} {'ms':>10} {'peak MiB':>10}")
+            for name, fn in (("table", whole_table), ("paged", paged)):
+                tracemalloc.start()
+                start = time.perf_counter()
+                count = fn(db, manager, args.page_size)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{name:>8} {count:>8} {elapsed * 1000:>10.1f} {peak / 2**20:>10.2f}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
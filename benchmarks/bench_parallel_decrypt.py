@@ -0,0 +1,53 @@
+"""
+Benchmark whole-vault decryption with HybridEncryptionManager.decrypt_many
+across 1..N worker threads.
+
+Usage: python benchmarks/bench_parallel_decrypt.py [--sizes 10000 100000] [--max-workers N]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from ciphervault.core.encryption import HybridEncryptionManager
+
+
+def build_records(manager, count):
+    items = []
+    for i in range(count):
+        service = f"service-{i % 500}"
+        plaintext = f"{service}|user{i}@example.com|{os.urandom(12).hex()}|note {i}".encode()
+        context = service.encode()
+        items.append((manager.encrypt(plaintext, context), context))
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--algo", choices=["aes", "chacha"], default="aes")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    manager = HybridEncryptionManager.from_keys(os.urandom(32), os.urandom(32), args.algo)
+    worker_counts = sorted({1, 2, 4, 8, args.max_workers} & set(range(1, args.max_workers + 1)))
+
+    print(f"{'entries':>8} {'workers':>8} {'best ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        items = build_records(manager, size)
+        baseline = None
+        for workers in worker_counts:
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                manager.decrypt_many(items, workers=workers)
+                best = min(best, time.perf_counter() - start)
+            baseline = baseline or best
+            print(f"{size:>8} {workers:>8} {best * 1000:>10.1f} {baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Cost of each database PRAGMA profile for single-entry writes (one commit
+each), point reads, full scans and single-entry deletes, plus the file size
+left after deleting half the entries.
+
+Usage: python benchmarks/bench_pragma_profiles.py [--entries 2000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from ciphervault.core.database import SecurePasswordDatabase, PRAGMA_PROFILES
+from ciphervault.core.encryption import HybridEncryptionManager
+
+
+def run_profile(path, profile, manager, count):
+    db = SecurePasswordDatabase(path, os.urandom(32), profile=profile)
+    db.set_profile(profile)
+    timings = {}
+    try:
+        start = time.perf_counter()
+        ids = []
+        for i in range(count):
+            service = f"service-{i % 100}"
+            record = manager.encrypt_record(os.urandom(200), service.encode())
+            ids.append(db.add_entry(record, context=service, algorithm_mechanism="aes"))
+        timings["write"] = time.perf_counter() - start
+
+        sample = random.sample(ids, min(count, 1000))
+        start = time.perf_counter()
+        for entry_id in sample:
+            db.get_entry(entry_id)
+        timings["read"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in db.iter_entry_pages():
+            pass
+        timings["scan"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for entry_id in ids[::2]:
+            db.delete_entry(entry_id)
+        timings["delete"] = time.perf_counter() - start
+        db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        db.close()
+    timings["size"] = os.path.getsize(path)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=2000)
+    args = parser.parse_args()
+
+    manager = HybridEncryptionManager.from_keys(os.urandom(32), os.urandom(32), "aes")
+    print(f"{'profile':>11} {'write ms':>10} {'read ms':>10} {'scan ms':>10} {'delete ms':>10} {'size KiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in PRAGMA_PROFILES:
+            t = run_profile(os.path.join(tmp, f"{profile}.db"), profile, manager, args.entries)
+            print(f"{profile:>11} {t['write'] * 1000:>10.1f} {t['read'] * 1000:>10.1f} "
+                  f"{t['scan'] * 1000:>10.1f} {t['delete'] * 1000:>10.1f} {t['size'] / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
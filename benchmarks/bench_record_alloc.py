@@ -0,0 +1,77 @@
+"""
+Compare peak memory and time of listing a vault by concatenating each row
+into prefixed bytes (and slicing it apart again in the cipher) versus
+passing the row's columns straight through as an EncryptedRecord.
+
+Usage: python benchmarks/bench_record_alloc.py [--entries 20000] [--size 256]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from ciphervault.core.database import SecurePasswordDatabase
+from ciphervault.core.encryption import HybridEncryptionManager
+
+
+def fill(db, manager, count, size):
+    with db.transaction():
+        for i in range(count):
+            service = f"service-{i % 500}"
+            record = manager.encrypt_record(os.urandom(size), service.encode())
+            db.add_entry(record, context=service, algorithm_mechanism=manager.algorithm)
+
+
+def concat_path(db, manager):
+    """Pre-record listing: build algo + nonce + ciphertext + tag per row"""
+    entries = db.get_all_entries()
+    items = [
+        (entry['record'].to_bytes(), entry['service'].encode())
+        for entry in entries
+    ]
+    return manager.decrypt_many(items)
+
+
+def record_path(db, manager):
+    entries = db.get_all_entries()
+    return manager.decrypt_many(
+        (entry['record'], entry['service'].encode()) for entry in entries
+    )
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--size", type=int, default=256, help="plaintext bytes per entry")
+    parser.add_argument("--algo", choices=["aes", "chacha"], default="aes")
+    args = parser.parse_args()
+
+    manager = HybridEncryptionManager.from_keys(os.urandom(32), os.urandom(32), args.algo)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SecurePasswordDatabase(os.path.join(tmp, "bench.db"), os.urandom(32))
+        try:
+            fill(db, manager, args.entries, args.size)
+            print(f"{'path':>8} {'ms':>10} {'peak MiB':>10}")
+            for name, fn in (("concat", concat_path), ("record", record_path)):
+                elapsed, peak = measure(fn, db, manager)
+                print(f"{name:>8} {elapsed * 1000:>10.1f} {peak / 2**20:>10.2f}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark vault unlock and master-password verification.
+
+Compares the key-check verification against the previous approach of
+opening a second SQLCipher connection with the candidate key, and times
+connection setup with and without the (unused) kdf_iter pragma.
+
+Usage: python benchmarks/bench_unlock.py [--iterations 120000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import sqlcipher3.dbapi2 as sqlite
+from ciphervault.core.encryption import KeyDerivation, KDF_PBKDF2
+from ciphervault.core.database import SecurePasswordDatabase
+from ciphervault.core.vault import PasswordVault, read_vault_header
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def open_raw(db_path, key, kdf_iter):
+    conn = sqlite.connect(db_path)
+    conn.execute(f"PRAGMA key = \"x'{key.hex()}'\"")
+    conn.execute("PRAGMA cipher_page_size = 4096")
+    if kdf_iter:
+        conn.execute("PRAGMA kdf_iter = 256000")
+    conn.execute("SELECT count(*) FROM vault_config").fetchone()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=120_000, help="PBKDF2 iterations for the test vault")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(workdir, "bench.db")
+        password = "benchmark-password"
+        kdf_params = {"kdf": KDF_PBKDF2, "iterations": args.iterations}
+        vault = PasswordVault(password, db_path=db_path, kdf_params=kdf_params)
+        db_key = vault.db_key
+        salt, _ = read_vault_header(vault.salt_path)
+
+        def second_connection_verify():
+            key_deriver = KeyDerivation(password, salt, kdf_params=kdf_params)
+            test_db = SecurePasswordDatabase(db_path, key_deriver.get_database_key())
+            test_db.get_config("algorithm")
+            test_db.close()
+
+        results = [
+            ("kdf only", best_of(lambda: KeyDerivation(password, salt, kdf_params=kdf_params), args.repeat)),
+            ("open connection (kdf_iter set)", best_of(lambda: open_raw(db_path, db_key, True), args.repeat)),
+            ("open connection (raw key only)", best_of(lambda: open_raw(db_path, db_key, False), args.repeat)),
+            ("verify: second connection", best_of(second_connection_verify, args.repeat)),
+            ("verify: key-check value", best_of(lambda: vault.verify_master_password(password), args.repeat)),
+            ("unlock: PasswordVault(password)", best_of(lambda: PasswordVault(password, db_path=db_path).db.close(), args.repeat)),
+        ]
+        vault.db.close()
+        for label, ms in results:
+            print(f"{label:<36} {ms:>9.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Check the CLI's cold-start import cost with `python -X importtime`.
+
+Imports the CLI entry module and the modules of commonly scripted commands
+in fresh interpreters and fails (exit status 1) if one takes longer than the
+budget or pulls in a dependency only a few commands need (HTTP, clipboard,
+password-strength packages, the vault's crypto and SQLCipher stack). The
+best of --repeat runs is used, as import times are noisy. Also fails if
+opening the CLI's vault through a running agent imports that stack.
+
+Usage: python benchmarks/check_import_time.py [--budget-ms 80] [--repeat 5]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Modules imported on every invocation, or by commands run from scripts
+CHECKED_MODULES = (
+    "ciphervault.cli.cli",
+    "ciphervault.cli.commands.list",
+    "ciphervault.cli.commands.search",
+    "ciphervault.cli.commands.retrieve",
+    "ciphervault.cli.commands.lock",
+    "ciphervault.cli.commands.agent",
+)
+# Only imported by the commands (or GUI features) that use them, or once a
+# vault is actually opened in-process
+DEFERRED_DEPENDENCIES = ("requests", "pyhibp", "zxcvbn", "pyperclip",
+                         "ciphervault.core.vault", "Cryptodome", "sqlcipher3")
+# Opens the CLI's vault with a stand-in for the agent connection, then prints
+# which of the given modules were imported
+AGENT_OPEN_SCRIPT = """
+import sys
+import ciphervault.cli.utils as utils
+utils.connect_agent = lambda db_path: object()
+utils.VaultContext(sys.argv[1]).open()
+print(" ".join(name for name in sys.argv[2:] if name in sys.modules))
+"""
+
+
+def python_env() -> dict:
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (SRC_DIR, os.environ.get("PYTHONPATH")))))
+
+
+def import_profile(module: str) -> dict:
+    """{imported module: cumulative import time in microseconds} for a fresh `import module`"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            env=python_env(), capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def agent_open_imports() -> list:
+    """Deferred dependencies imported when the CLI's vault is served by an agent"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = subprocess.run([sys.executable, "-c", AGENT_OPEN_SCRIPT, os.path.join(tmp_dir, "check.db"),
+                                 *DEFERRED_DEPENDENCIES],
+                                env=python_env(), capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=80.0,
+                        help="Maximum import time of each checked module")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    for module in CHECKED_MODULES:
+        profiles = [import_profile(module) for _ in range(args.repeat)]
+        best_ms = min(profile[module] for profile in profiles) / 1000
+        deferred = sorted(dep for dep in DEFERRED_DEPENDENCIES if dep in profiles[0])
+        status = "ok"
+        if best_ms > args.budget_ms:
+            status = "OVER BUDGET"
+            failures.append(f"{module} takes {best_ms:.1f} ms to import (budget {args.budget_ms:.0f} ms)")
+        if deferred:
+            status = "EAGER IMPORTS"
+            failures.append(f"{module} imports {', '.join(deferred)}")
+        print(f"{module:<40} {best_ms:>8.1f} ms  {status}")
+
+    deferred = agent_open_imports()
+    if deferred:
+        failures.append(f"opening the vault through an agent imports {', '.join(deferred)}")
+    print(f"{'agent-backed open':<40} {'':>11}  {'EAGER IMPORTS' if deferred else 'ok'}")
+
+    if failures:
+        print()
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,8 @@ PyInstaller.__main__.run([
     "--add-data", "vaults;vaults",
     "--hidden-import", "numpy",
     "--hidden-import", "numpy.core.multiarray",
+    # Commands are imported lazily by name (see cli.COMMANDS)
+    "--collect-submodules", "ciphervault.cli.commands",
     "--clean"
 ])
 
@@ -1,44 +1,41 @@
 import click
+from ciphervault.cli.utils import VaultContext, LazyGroup
 
-@click.group()
+# Command modules are imported only for the command being run; see
+# benchmarks/check_import_time.py for the startup budget this protects.
+COMMANDS = {
+    'init': 'ciphervault.cli.commands.init:init_cmd',
+    'add': 'ciphervault.cli.commands.add:add_cmd',
+    'login': 'ciphervault.cli.commands.login:login_cmd',
+    'list': 'ciphervault.cli.commands.list:list_cmd',
+    'search': 'ciphervault.cli.commands.search:search_cmd',
+    'get': 'ciphervault.cli.commands.retrieve:retrieve_cmd',
+    'update': 'ciphervault.cli.commands.update:update_cmd',
+    'delete': 'ciphervault.cli.commands.delete:delete_cmd',
+    'change-algo': 'ciphervault.cli.commands.change_algo:change_algo_cmd',
+    'change-master-pwd': 'ciphervault.cli.commands.change_master_pwd:change_master_pwd_cmd',
+    'lock': 'ciphervault.cli.commands.lock:lock_cmd',
+    'gen-pwd': 'ciphervault.cli.commands.gen_pwd:gen_pwd_cmd',
+    'breach-status': 'ciphervault.cli.commands.breach_check:breach_status_cmd',
+    'import': 'ciphervault.cli.commands.import_entries:import_cmd',
+    'import-csv': 'ciphervault.cli.commands.import_csv:import_csv_cmd',
+    'export': 'ciphervault.cli.commands.export_entries:export_cmd',
+    'export-bkp': 'ciphervault.cli.commands.export_backup:export_bkp_cmd',
+    'calibrate-kdf': 'ciphervault.cli.commands.calibrate_kdf:calibrate_kdf_cmd',
+    'db-profile': 'ciphervault.cli.commands.db_profile:db_profile_cmd',
+    'maintain': 'ciphervault.cli.commands.maintain:maintain_cmd',
+    'agent': 'ciphervault.cli.commands.agent:agent_cmd',
+    'batch': 'ciphervault.cli.commands.batch:batch_cmd',
+}
+
+@click.group(cls=LazyGroup, lazy_subcommands=COMMANDS)
 @click.option('--db', help='Path to the vault database file.')
+@click.option('--timings', is_flag=True, help='Print session check, vault open and command timings to stderr.')
 @click.pass_context
-def cli(ctx, db):
+def cli(ctx, db, timings):
     """CipherVault: Secure Password Manager CLI"""
-    ctx.ensure_object(dict)
-    ctx.obj['db'] = db
-
-from ciphervault.cli.commands.add import add_cmd
-from ciphervault.cli.commands.login import login_cmd
-from ciphervault.cli.commands.list import list_cmd
-from ciphervault.cli.commands.retrieve import retrieve_cmd
-from ciphervault.cli.commands.update import update_cmd
-from ciphervault.cli.commands.delete import delete_cmd
-from ciphervault.cli.commands.change_algo import change_algo_cmd
-from ciphervault.cli.commands.change_master_pwd import change_master_pwd_cmd
-from ciphervault.cli.commands.init import init_cmd
-from ciphervault.cli.commands.lock import lock_cmd
-from ciphervault.cli.commands.gen_pwd import gen_pwd_cmd
-from ciphervault.cli.commands.breach_check import breach_status_cmd
-from ciphervault.cli.commands.export_entries import export_cmd
-from ciphervault.cli.commands.export_backup import export_bkp_cmd
-from ciphervault.cli.commands.import_entries import import_cmd
-
-cli.add_command(init_cmd)
-cli.add_command(add_cmd)
-cli.add_command(login_cmd)
-cli.add_command(list_cmd)
-cli.add_command(retrieve_cmd)
-cli.add_command(update_cmd)
-cli.add_command(delete_cmd)
-cli.add_command(change_algo_cmd)
-cli.add_command(change_master_pwd_cmd)
-cli.add_command(lock_cmd)
-cli.add_command(gen_pwd_cmd)
-cli.add_command(breach_status_cmd)
-cli.add_command(import_cmd)
-cli.add_command(export_cmd)
-cli.add_command(export_bkp_cmd)
+    ctx.obj = VaultContext(db, show_timings=timings)
+    ctx.call_on_close(ctx.obj.close)
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
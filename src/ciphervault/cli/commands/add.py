@@ -1,8 +1,6 @@
 import click
 from getpass import getpass
-from ciphervault.core.vault import PasswordVault
-from ciphervault.cli.utils import sessionTimeoutCheck
-from ciphervault.core.utils import resolve_vault_path
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
 
 @click.command('add')
 @sessionTimeoutCheck
@@ -13,7 +11,6 @@ from ciphervault.core.utils import resolve_vault_path
 def add_cmd(ctx, service, username, notes):
     """Add a new password entry."""
     password = getpass("Password: ")
-    vault = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
+    vault = open_vault(ctx)
     vault.add_password_entry(service, username, password, notes)
     click.echo(f"Added entry for (service: {service} and username: {username})")
-    vault.lock()
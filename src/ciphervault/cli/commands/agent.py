@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import click
+from ciphervault.core.agent import VaultAgent, AgentError, connect_agent, stop_agent, AGENT_START_TIMEOUT
+from ciphervault.core.session import SessionStore, get_session_key
+from ciphervault.cli.utils import sessionTimeoutCheck
+
+def _run_agent(db_path, timeout):
+    """Body of the forked agent process"""
+    os.setsid()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    try:
+        # Only the agent process needs the vault, crypto and SQLCipher modules
+        from ciphervault.core.vault import PasswordVault
+        if timeout is None:
+            timeout = SessionStore(db_path, get_session_key()).load()["timeout"]
+        VaultAgent(PasswordVault(db_path=db_path), timeout).serve()
+    finally:
+        os._exit(0)
+
+@click.group('agent')
+def agent_cmd():
+    """Keep the vault unlocked in a background agent between commands."""
+
+@agent_cmd.command('start')
+@sessionTimeoutCheck
+@click.option('--timeout', type=click.IntRange(min=1),
+              help='Idle seconds before the agent locks the vault (default: the session timeout).')
+@click.pass_context
+def agent_start_cmd(ctx, timeout):
+    """Start the agent for this vault."""
+    db_path = ctx.obj.db_path
+    proxy = connect_agent(db_path)
+    if proxy is not None:
+        proxy.lock()
+        click.echo("The vault agent is already running.")
+        return
+    if not hasattr(os, "fork"):
+        raise click.ClickException("The vault agent needs Unix domain sockets and fork().")
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        _run_agent(db_path, timeout)
+    deadline = time.monotonic() + AGENT_START_TIMEOUT
+    while time.monotonic() < deadline:
+        proxy = connect_agent(db_path)
+        if proxy is not None:
+            try:
+                agent_timeout = proxy.ping()
+            except AgentError:
+                agent_timeout = None
+            finally:
+                proxy.lock()
+            if agent_timeout is not None:
+                click.echo(f"Vault agent started (pid {pid}); it locks after {agent_timeout}s without use.")
+                return
+        time.sleep(0.05)
+    raise click.ClickException("The vault agent did not start.")
+
+@agent_cmd.command('stop')
+@click.pass_context
+def agent_stop_cmd(ctx):
+    """Stop the agent, keeping the CLI session."""
+    if stop_agent(ctx.obj.db_path):
+        click.echo("Vault agent stopped.")
+    else:
+        click.echo("No vault agent is running.")
+
+@agent_cmd.command('status')
+@click.pass_context
+def agent_status_cmd(ctx):
+    """Show whether the agent is running."""
+    try:
+        proxy = connect_agent(ctx.obj.db_path)
+    except AgentError as e:
+        raise click.ClickException(str(e))
+    if proxy is None:
+        click.echo("No vault agent is running.")
+        return
+    try:
+        click.echo(f"Vault agent is running; it locks after {proxy.ping()}s without use.")
+    finally:
+        proxy.lock()
@@ -0,0 +1,37 @@
+import json
+import click
+from ciphervault.core.agent import AgentVaultProxy, AgentError
+from ciphervault.core.batch import BatchExecutor, BATCH_TRANSACTION_SIZE, commit_chunks
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
+
+def _agent_results(proxy, lines, transaction_size):
+    """Send the stream to the agent a chunk at a time, so results still arrive as input is read"""
+    for first_line, chunk in commit_chunks(lines, transaction_size):
+        yield from proxy.run_batch(chunk, first_line, transaction_size)
+
+@click.command('batch')
+@sessionTimeoutCheck
+@click.argument('ops_file', type=click.File('r', encoding='utf-8'), default='-')
+@click.option('--transaction-size', default=BATCH_TRANSACTION_SIZE, show_default=True, type=click.IntRange(min=1),
+              help='Writes committed per transaction.')
+@click.pass_context
+def batch_cmd(ctx, ops_file, transaction_size):
+    """
+    Run JSON-lines operations (get, add, update, delete, search) from
+    OPS_FILE or stdin against the unlocked vault, writing one JSON result
+    per line. Exits with status 1 if any operation failed.
+    """
+    vault = open_vault(ctx)
+    if isinstance(vault, AgentVaultProxy):
+        results = _agent_results(vault, iter(ops_file), transaction_size)
+    else:
+        results = BatchExecutor(vault, transaction_size).run(ops_file)
+    failed = 0
+    try:
+        for result in results:
+            failed += not result["ok"]
+            click.echo(json.dumps(result))
+    except AgentError as e:
+        raise click.ClickException(str(e))
+    if failed:
+        ctx.exit(1)
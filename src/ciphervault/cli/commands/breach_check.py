@@ -1,7 +1,7 @@
+import itertools
 import click
-from ciphervault.core.utils import is_password_pwned, resolve_vault_path
-from ciphervault.core.vault import PasswordVault
-from ciphervault.cli.utils import sessionTimeoutCheck
+from ciphervault.core.utils import is_password_pwned
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
 
 @click.command('breach-status')
 @sessionTimeoutCheck
@@ -10,17 +10,18 @@ from ciphervault.cli.utils import sessionTimeoutCheck
 def breach_status_cmd(ctx, only_breached):
     """List all password entries with breach status from HIBP"""
     try:
-        vault_obj = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
-        entries = vault_obj.list_entries()
+        vault_obj = open_vault(ctx)
+        entries = vault_obj.iter_entries()
+        first = next(entries, None)
 
-        if not entries:
+        if first is None:
             click.echo("No entries found in the vault.")
             return
 
         click.echo(f"\n{'Service':<20} {'Username':<30} {'Breach Status'}")
         click.echo("-" * 60)
 
-        for e in entries:
+        for e in itertools.chain((first,), entries):
             try:
                 details = vault_obj.get_entry_details(e['id'])
                 breached = is_password_pwned(details['password'])
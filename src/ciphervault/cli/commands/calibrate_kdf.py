@@ -0,0 +1,43 @@
+import os
+import click
+from getpass import getpass
+from ciphervault.core.vault import PasswordVault
+from ciphervault.core.agent import stop_agent
+from ciphervault.core.encryption import calibrate_kdf, argon2_available, DEFAULT_UNLOCK_MS, KDF_ARGON2ID, KDF_PBKDF2
+
+@click.command('calibrate-kdf')
+@click.option('--target-ms', type=int, default=DEFAULT_UNLOCK_MS, show_default=True, help='Target unlock time in milliseconds.')
+@click.option('--kdf', type=click.Choice([KDF_ARGON2ID, KDF_PBKDF2]), default=None, help='KDF to calibrate (default: Argon2id if available).')
+@click.option('--apply', is_flag=True, help='Re-key the vault selected with --db using the calibrated parameters.')
+@click.pass_context
+def calibrate_kdf_cmd(ctx, target_ms, kdf, apply):
+    """Measure KDF parameters that hit a target unlock time on this machine."""
+    if kdf == KDF_ARGON2ID and not argon2_available():
+        click.echo("Argon2id requires the 'argon2-cffi' package.")
+        return
+    click.echo(f"Calibrating for ~{target_ms} ms unlock time...")
+    params = calibrate_kdf(target_ms, kdf)
+    for key, value in params.items():
+        click.echo(f"  {key}: {value}")
+
+    if not apply:
+        return
+    db_path = ctx.obj.db_path
+    if not os.path.exists(db_path):
+        click.echo(f"Vault file '{db_path}' does not exist.")
+        return
+    master_password = getpass("Master password: ")
+    try:
+        vault = PasswordVault(master_password, db_path=db_path)
+    except Exception as e:
+        click.echo(f"Could not unlock vault: {e}")
+        return
+    try:
+        # A running agent would keep serving with the old keys
+        stop_agent(db_path)
+        vault.change_kdf(params, master_password)
+        click.echo("Vault KDF updated. Please log in again.")
+    except Exception as e:
+        click.echo(f"Failed to update KDF: {e}")
+    finally:
+        vault.close()
@@ -1,7 +1,6 @@
 import click
-from ciphervault.core.vault import PasswordVault
-from ciphervault.cli.utils import sessionTimeoutCheck
-from ciphervault.core.utils import resolve_vault_path
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
+from ciphervault.core.agent import stop_agent
 
 @click.command('change-algo')
 @sessionTimeoutCheck
@@ -10,18 +9,23 @@ from ciphervault.core.utils import resolve_vault_path
 @click.pass_context
 def change_algo_cmd(ctx, master_password, new_algo):
     """Change the encryption algorithm for the vault."""
-    vault = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
+    vault = open_vault(ctx, use_agent=False)
     if not vault.verify_master_password(master_password):
         click.echo("Incorrect master password. Please try again!")
         vault.close()
         return
     try:
-        vault.change_algorithm(new_algo)
-        if vault.algorithm != new_algo.lower():
-            click.echo(f"Algorithm changed from {vault.algorithm} to {new_algo}.")
-        else:
-            click.echo(f"Current Algorithm : {vault.algorithm}, Hence no changes made. Exiting!")
+        old_algo = vault.algorithm_mech
+        if old_algo == new_algo.lower() and not vault.get_config("algo_migration_target"):
+            click.echo(f"Current Algorithm : {old_algo}, Hence no changes made. Exiting!")
+            return
+        # A running agent would keep writing with the old algorithm
+        stop_agent(ctx.obj.db_path)
+        with click.progressbar(length=vault.db.count_entries(), label="Re-encrypting entries") as bar:
+            vault.change_algorithm(new_algo, progress=lambda done, total: bar.update(done - bar.pos))
+        click.echo(f"Algorithm changed from {old_algo} to {new_algo}.")
     except Exception as e:
         click.echo(f"Error: {e}")
+        click.echo("Re-run 'cvault change-algo' with the same algorithm to resume the migration.")
     finally:
-        vault.close()
\ No newline at end of file
+        vault.close()
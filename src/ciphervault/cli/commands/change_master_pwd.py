@@ -1,8 +1,8 @@
 import click
 from getpass import getpass
-from ciphervault.core.vault import PasswordVault
-from ciphervault.cli.utils import sessionTimeoutCheck
-from ciphervault.core.utils import is_password_pwned, resolve_vault_path
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
+from ciphervault.core.agent import stop_agent
+from ciphervault.core.utils import is_password_pwned
 
 @click.command('change-master-pwd')
 @sessionTimeoutCheck
@@ -11,7 +11,7 @@ from ciphervault.core.utils import is_password_pwned, resolve_vault_path
 def change_master_pwd_cmd(ctx, current_master_password):
     """Change the master password for your vault."""
     try:
-        vault = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
+        vault = open_vault(ctx, use_agent=False)
         if not vault.verify_master_password(current_master_password):
             click.echo("Incorrect existing master password. Please try again!")
             vault.close()
@@ -33,8 +33,10 @@ def change_master_pwd_cmd(ctx, current_master_password):
                 break
 
 
+        # A running agent would keep serving with the old keys
+        stop_agent(ctx.obj.db_path)
         # Change password in the vault
-        vault.change_master_password(new_password)
+        vault.change_master_password(new_password, current_password=current_master_password)
         vault.close()
 
         click.echo("Master password changed successfully. Please log in again with your new password.")
@@ -0,0 +1,20 @@
+import click
+from ciphervault.core.database import PRAGMA_PROFILES
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
+
+@click.command('db-profile')
+@sessionTimeoutCheck
+@click.argument('profile', required=False, type=click.Choice(list(PRAGMA_PROFILES)))
+@click.pass_context
+def db_profile_cmd(ctx, profile):
+    """Show or set the database performance profile (paranoid, balanced, throughput)."""
+    vault = open_vault(ctx, use_agent=False)
+    if profile:
+        vault.set_db_profile(profile)
+        click.echo(f"Database profile set to '{profile}'.")
+    else:
+        current = vault.get_db_profile()
+        for name, pragmas in PRAGMA_PROFILES.items():
+            marker = "*" if name == current else " "
+            settings = ", ".join(f"{pragma}={value}" for pragma, value in pragmas.items())
+            click.echo(f"{marker} {name:<11} {settings}")
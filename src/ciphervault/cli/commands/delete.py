@@ -1,7 +1,5 @@
 import click
-from ciphervault.core.vault import PasswordVault
-from ciphervault.cli.utils import sessionTimeoutCheck
-from ciphervault.core.utils import resolve_vault_path
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
 
 @click.command('delete')
 @sessionTimeoutCheck
@@ -11,10 +9,9 @@ from ciphervault.core.utils import resolve_vault_path
 @click.pass_context
 def delete_cmd(ctx, master_password, service, username):
     """Delete an entry by specifying service and username."""
-    vault = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
+    vault = open_vault(ctx)
     if not vault.verify_master_password(master_password):
         click.echo("Incorrect master password. Please try again!")
-        vault.lock()
         return
     try:
         # If both service and username are provided, try direct deletion
@@ -55,5 +52,3 @@ def delete_cmd(ctx, master_password, service, username):
 
     except Exception as e:
         click.echo(f"Error: {e}")
-    finally:
-        vault.lock()
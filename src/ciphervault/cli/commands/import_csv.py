@@ -0,0 +1,52 @@
+import csv
+import time
+import click
+from ciphervault.core.vault import IMPORT_BATCH_SIZE
+from ciphervault.core.records import split_tags
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
+
+def _csv_entries(reader):
+    """
+    Entries from the CSV rows. Rows are checked as they are read, since the
+    vault consumes them a batch at a time and reader.line_num is past the
+    bad row by the time it fails.
+    """
+    for row in reader:
+        if not row['service'] or not row['username']:
+            raise ValueError(f"line {reader.line_num}: each entry needs a service and a username")
+        yield {
+            'service': row['service'],
+            'username': row['username'],
+            'password': row['password'],
+            'notes': row.get('notes') or '',
+            'tags': split_tags(row.get('tags') or ''),
+        }
+
+@click.command('import-csv')
+@sessionTimeoutCheck
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True, type=click.IntRange(min=1),
+              help='Entries encrypted and inserted per batch.')
+@click.option('--atomic/--no-atomic', default=True, show_default=True,
+              help='Import everything in one transaction, or commit after each batch.')
+@click.pass_context
+def import_csv_cmd(ctx, csv_file, batch_size, atomic):
+    """
+    Import credentials from a CSV file with a header row of
+    service,username,password[,notes][,tags] (tags comma-separated).
+    """
+    reader = csv.DictReader(csv_file)
+    missing = {'service', 'username', 'password'} - set(reader.fieldnames or ())
+    if missing:
+        raise click.ClickException(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+
+    vault = open_vault(ctx, use_agent=False)
+    try:
+        start = time.perf_counter()
+        ids = vault.add_password_entries(_csv_entries(reader), batch_size=batch_size, atomic=atomic)
+        click.echo(f"Imported {len(ids)} entries in {time.perf_counter() - start:.1f}s")
+    except csv.Error as e:
+        # Raised while the row is parsed, so line_num is still that row's
+        raise click.ClickException(f"Import failed at line {reader.line_num}: {e}")
+    except ValueError as e:
+        raise click.ClickException(f"Import failed: {e}")
@@ -4,21 +4,24 @@ import pyotp
 from getpass import getpass
 from ciphervault.core.vault import PasswordVault
 from ciphervault.core.utils import resolve_vault_path
+from ciphervault.core.encryption import calibrate_kdf, argon2_available, DEFAULT_UNLOCK_MS, KDF_ARGON2ID, KDF_PBKDF2
 
 @click.command('init')
 @click.option('--algo', type=click.Choice(['aes', 'chacha', 'hybrid']), default='hybrid', help='Encryption algorithm.')
 @click.option('--db', help='Full Path to the vault database file.')
 @click.option('--enable-mfa/--disable-mfa', default=None, help='Enable or disable TOTP. If not set, will prompt interactively.')
-def init_cmd(algo, db, enable_mfa):
+@click.option('--kdf', type=click.Choice([KDF_ARGON2ID, KDF_PBKDF2]), default=None, help='Password KDF (default: Argon2id if available).')
+@click.option('--unlock-ms', type=int, default=DEFAULT_UNLOCK_MS, show_default=True, help='Target unlock time used to calibrate the KDF.')
+def init_cmd(algo, db, enable_mfa, kdf, unlock_ms):
     """Initialize a new vault."""
     db_path = resolve_vault_path(db)
     
     if os.path.exists(db_path):
         click.confirm(f"Vault file '{db}' already exists. Overwrite?", abort=True)
         os.remove(db_path)
-        salt_path = resolve_vault_path(f"{os.path.splitext(db)[0]}.salt")
-        if os.path.exists(salt_path):
-            os.remove(salt_path)
+        for salt_path in (db_path + ".salt", resolve_vault_path(f"{os.path.splitext(db)[0]}.salt")):
+            if os.path.exists(salt_path):
+                os.remove(salt_path)
     
     while True:
         master_password = getpass("Set a new master password: ")
@@ -45,7 +48,13 @@ def init_cmd(algo, db, enable_mfa):
     else:
         totp_secret = None
     
-    vault = PasswordVault(master_password, db_path=db, algorithm=algo)
+    if kdf == KDF_ARGON2ID and not argon2_available():
+        click.echo("Argon2id requires the 'argon2-cffi' package.")
+        return
+    kdf_params = calibrate_kdf(unlock_ms, kdf)
+    click.echo(f"KDF: {kdf_params['kdf']} calibrated to ~{kdf_params['measured_ms']} ms unlock time")
+
+    vault = PasswordVault(master_password, db_path=db_path, algorithm_mech=algo, kdf_params=kdf_params)
     vault.db.set_config("totp_key", totp_secret)
     click.echo(f"Vault registered and initialized at '{db_path}' with algorithm: {algo}")
     vault.lock()
\ No newline at end of file
@@ -1,17 +1,15 @@
 import click
-from ciphervault.core.vault import PasswordVault
-from ciphervault.cli.utils import sessionTimeoutCheck
-from ciphervault.core.utils import resolve_vault_path
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
 
 @click.command('list')
 @sessionTimeoutCheck
 @click.pass_context
 def list_cmd(ctx):
     """List all entries."""
-    vault = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
-    entries = vault.list_entries()
-    if not entries:
-        click.echo("No entries found.")
-    for entry in entries:
+    vault = open_vault(ctx)
+    count = 0
+    for entry in vault.iter_entries():
         click.echo(f"Service: {entry['service']} | Username: {entry['username']} | Notes: {entry['notes']}")
-    vault.lock()
\ No newline at end of file
+        count += 1
+    if not count:
+        click.echo("No entries found.")
\ No newline at end of file
@@ -1,6 +1,6 @@
 import click
-from ciphervault.core.vault import PasswordVault
-from ciphervault.core.utils import resolve_vault_path
+from ciphervault.core.agent import stop_agent
+from ciphervault.core.session import SessionStore, clear_session_keys
 
 @click.command('lock')
 @click.pass_context
@@ -9,8 +9,11 @@ def lock_cmd(ctx):
     Lock (logout of) the vault.
     """
     try:
-        vault = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
-        vault.close()
+        db_path = ctx.obj.db_path
+        stop_agent(db_path)
+        # Ending the session only needs the keyring and the session file
+        clear_session_keys()
+        SessionStore(db_path).clear()
         click.echo("Vault locked and session ended.")
     except Exception as e:
         click.echo(f"Error locking vault: {e}")
@@ -4,17 +4,19 @@ from getpass import getpass
 import keyring
 import base64
 import pyotp
-import datetime
 from ciphervault.core.vault import PasswordVault
 from ciphervault.core.utils import is_password_pwned
-from ciphervault.core.utils import resolve_vault_path
+from ciphervault.cli.utils import start_session
+
+def _migration_progress(description, done, total):
+    click.echo(f"\r{description}: {done}/{total}", nl=done >= total)
 
 @click.command('login')
 @click.pass_context
 def login_cmd(ctx):
     """Login to the vault"""
-    db_path = resolve_vault_path(ctx.obj['db'])
-    print(ctx.obj['db'])
+    db_path = ctx.obj.db_path
+    print(ctx.obj.db)
     if not os.path.exists(db_path):
         click.echo(f"Vault file '{db_path}' does not exist.")
         click.echo("Please initialize a new vault first using 'cvault init'.")
@@ -27,7 +29,7 @@ def login_cmd(ctx):
         click.secho("The master password has not been found in known data breaches. Continuing with logging in to the vault", fg='green')
 
     try:
-        vault = PasswordVault(master_password, db_path=db_path)
+        vault = PasswordVault(master_password, db_path=db_path, progress=_migration_progress)
         if vault.get_config("totp_key"):
             totp_code = getpass("TOTP Code: ")
             totp_key = vault.db.get_config("totp_key")
@@ -39,8 +41,7 @@ def login_cmd(ctx):
                 return
         b64_key = base64.b64encode(vault.db_key).decode()  # bytes → base64 string
         keyring.set_password("database_key", "db_key", b64_key)
-        now = datetime.datetime.utcnow()
-        vault.update_config("last_used", now.isoformat())
+        start_session(vault)
         click.echo("Login successful. Welcome to CipherVault CLI!")
         vault.lock()
     except Exception as e:
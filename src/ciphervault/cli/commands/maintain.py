@@ -0,0 +1,38 @@
+import click
+from ciphervault.core.vault import MAINTENANCE_SLICE_PAGES
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
+
+@click.command('maintain')
+@sessionTimeoutCheck
+@click.option('--pages', default=MAINTENANCE_SLICE_PAGES, show_default=True, type=click.IntRange(min=1),
+              help='Free pages reclaimed per slice.')
+@click.option('--max-slices', default=0, type=click.IntRange(min=0),
+              help='Stop after this many slices (0 = until no free pages are left).')
+@click.option('--convert', is_flag=True,
+              help='Rebuild a vault created without auto-vacuum (one full VACUUM) so it can vacuum incrementally.')
+@click.pass_context
+def maintain_cmd(ctx, pages, max_slices, convert):
+    """Reclaim free pages and checkpoint the WAL in bounded slices."""
+    vault = open_vault(ctx, use_agent=False)
+    slices = 0
+    reclaimed = 0
+    while True:
+        last_slice = bool(max_slices) and slices + 1 >= max_slices
+        report = vault.maintain(max_pages=pages, convert=convert,
+                                checkpoint="PASSIVE" if not last_slice else "TRUNCATE")
+        slices += 1
+        reclaimed += report['reclaimed_pages']
+        if report['converted']:
+            click.echo("Vault rebuilt with incremental auto-vacuum.")
+        if report['needs_conversion']:
+            click.echo("This vault was created without auto-vacuum; run with --convert to rebuild it once.")
+            break
+        if last_slice or not report['freelist_after'] or not report['reclaimed_pages']:
+            break
+    if not last_slice:
+        report = vault.maintain(max_pages=pages, checkpoint="TRUNCATE")
+        reclaimed += report['reclaimed_pages']
+    click.echo(f"Reclaimed {reclaimed} page(s) in {slices} slice(s); "
+               f"{report['freelist_after']} free page(s) left of {report['page_count']}.")
+    if report['checkpoint_busy']:
+        click.echo("WAL checkpoint was blocked by another connection; it will be retried next time.")
@@ -1,25 +1,73 @@
+import json
+import shlex
 import click
 from getpass import getpass
-from ciphervault.core.vault import PasswordVault
-from ciphervault.cli.utils import sessionTimeoutCheck
-from ciphervault.core.utils import resolve_vault_path
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
+
+# Entry fields shown by 'cvault get', in output order
+OUTPUT_FIELDS = ('service', 'username', 'password', 'notes', 'tags')
+
+def _echo_entry(entry_details, field, output_format):
+    values = {name: entry_details[name] for name in ((field,) if field else OUTPUT_FIELDS)}
+    if output_format == 'json':
+        click.echo(json.dumps(values[field] if field else values))
+        return
+    for name, value in values.items():
+        if name == 'tags':
+            value = ", ".join(value)
+        if output_format == 'env':
+            click.echo(f"CVAULT_{name.upper()}={shlex.quote(value)}")
+        elif output_format == 'raw':
+            click.echo(value)
+        else:
+            click.echo(f"{name.capitalize()}: {value}")
+
+def _lookup_entry(vault, service, username):
+    """
+    The entry for service (and username), found through the blind index
+    without listing the vault. Both branches match service and username
+    exactly (case-sensitive), like the interactive selection.
+    """
+    if username:
+        entry = vault.find_entry(service, username)
+        if not entry:
+            raise click.ClickException(f"No entry found for service '{service}' and username '{username}'.")
+        return entry
+    entries = vault.get_entries_by_service(service)
+    if not entries:
+        raise click.ClickException(f"No entries found for service '{service}'.")
+    if len(entries) > 1:
+        usernames = ", ".join(sorted(entry['username'] for entry in entries))
+        raise click.ClickException(f"Service '{service}' has several accounts ({usernames}); pass --username.")
+    return entries[0]
 
 @click.command('get')
 @sessionTimeoutCheck
+@click.option('--service', help='Service of the entry; skips the interactive selection.')
+@click.option('--username', help='Username of the entry (needed when the service has several accounts).')
+@click.option('--field', type=click.Choice(OUTPUT_FIELDS), help='Output only this field.')
+@click.option('--format', 'output_format', type=click.Choice(['text', 'json', 'env', 'raw']), default='text',
+              show_default=True, help='Output format.')
 @click.pass_context
-def retrieve_cmd(ctx):
+def retrieve_cmd(ctx, service, username, field, output_format):
     """
     Retrieve an entry by service and (optionally) account.
-    Guides the user to select a service, then an account if multiple exists.
+    Without --service, guides the user to select a service, then an account if multiple exists.
     """
-    vault = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
+    if username and not service:
+        raise click.UsageError("--username needs --service.")
+    vault = open_vault(ctx)
+
+    if service:
+        entry_details = vault.get_entry_details(_lookup_entry(vault, service, username)['id'])
+        _echo_entry(entry_details, field, output_format)
+        return
 
     # Step 1: List all unique services
     entries = vault.list_entries()
     services = sorted(set(entry['service'] for entry in entries))
     if not services:
         click.echo("No entries found in the vault.")
-        vault.lock()
         return
 
     # Step 2: Prompt user to select a service
@@ -41,7 +89,6 @@ def retrieve_cmd(ctx):
     service_entries = vault.get_entries_by_service(selected_service)
     if not service_entries:
         click.echo("No entries found for the selected service.")
-        vault.close()
         return
 
     # Step 4: If multiple entries, prompt for entry selection
@@ -67,10 +114,7 @@ def retrieve_cmd(ctx):
     # Step 5: Display the entry details
     entry_details = vault.get_entry_details(entry['id'])
     if entry_details:
-        click.echo(f"\nService: {entry_details['service']}")
-        click.echo(f"Username: {entry_details['username']}")
-        click.echo(f"Password: {entry_details['password']}")
-        click.echo(f"Notes: {entry_details['notes']}")
+        click.echo()
+        _echo_entry(entry_details, field, output_format)
     else:
         click.echo("Entry not found.")
-    vault.lock()
@@ -0,0 +1,18 @@
+import click
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
+
+@click.command('search')
+@sessionTimeoutCheck
+@click.argument('query')
+@click.option('--limit', default=50, show_default=True, type=click.IntRange(min=1),
+              help='Maximum number of entries shown.')
+@click.pass_context
+def search_cmd(ctx, query, limit):
+    """Search entries by service, username, notes and tags."""
+    vault = open_vault(ctx)
+    entries = vault.search(query, limit=limit)
+    for entry in entries:
+        tags = f" | Tags: {', '.join(entry['tags'])}" if entry['tags'] else ""
+        click.echo(f"Service: {entry['service']} | Username: {entry['username']} | Notes: {entry['notes']}{tags}")
+    if not entries:
+        click.echo("No matching entries found.")
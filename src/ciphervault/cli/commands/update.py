@@ -1,8 +1,6 @@
 import click
 from getpass import getpass
-from ciphervault.core.vault import PasswordVault
-from ciphervault.cli.utils import sessionTimeoutCheck
-from ciphervault.core.utils import resolve_vault_path
+from ciphervault.cli.utils import sessionTimeoutCheck, open_vault
 
 @click.command('update')
 @sessionTimeoutCheck
@@ -12,10 +10,9 @@ from ciphervault.core.utils import resolve_vault_path
 @click.pass_context
 def update_cmd(ctx, service, username, master_password):
     """Update an existing entry. Leave any field blank to keep its current value."""
-    vault = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
+    vault = open_vault(ctx)
     if not vault.verify_master_password(master_password):
         click.echo("Incorrect master password. Please try again!")
-        vault.lock()
         return
     try:
         # If service and username not provided, let user select entry interactively
@@ -55,6 +52,4 @@ def update_cmd(ctx, service, username, master_password):
         else:
             click.echo("Entry not found or update failed.")
     except Exception as e:
-        click.echo(f"Error: {e}")
-    finally:
-        vault.lock()
\ No newline at end of file
+        click.echo(f"Error: {e}")
\ No newline at end of file
@@ -1,37 +1,136 @@
-import datetime
+import time
 import click
 import functools
-import keyring
-from ciphervault.core.vault import PasswordVault
+import importlib
+from contextlib import contextmanager
+from ciphervault.core.agent import AgentError, connect_agent, stop_agent
+from ciphervault.core.session import SessionStore, DEFAULT_SESSION_TIMEOUT, clear_session_keys, get_session_key
 from ciphervault.core.utils import resolve_vault_path
 
+
+class LazyGroup(click.Group):
+    """
+    A click group whose subcommands are given as {name: "module:attribute"}
+    and imported only when they run (or when help lists them).
+    """
+    def __init__(self, *args, lazy_subcommands: dict = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_subcommands and cmd_name not in self.commands:
+            module_name, attribute = self.lazy_subcommands[cmd_name].split(":")
+            self.add_command(getattr(importlib.import_module(module_name), attribute), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
+class VaultContext:
+    """
+    Per-invocation state kept in ctx.obj. The vault is opened on first use
+    and shared by sessionTimeoutCheck and the command, so an invocation
+    loads the session keys and opens the database at most once; close()
+    runs when the root context closes, also if the command fails.
+    """
+    def __init__(self, db: str = None, show_timings: bool = False):
+        self.db = db
+        self.show_timings = show_timings
+        self.timings = {}
+        self._db_path = None
+        self._vault = None
+        self._started = time.perf_counter()
+
+    @property
+    def db_path(self) -> str:
+        if self._db_path is None:
+            self._db_path = resolve_vault_path(self.db)
+        return self._db_path
+
+    @contextmanager
+    def timed(self, name: str):
+        """Add the time spent in the block to timings[name] (seconds)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def open(self, use_agent: bool = True):
+        """
+        The vault for this invocation: a proxy to the running agent if there
+        is one and use_agent is set, otherwise a PasswordVault opened from
+        the session keys. Later calls return the same object.
+        """
+        if self._vault is None:
+            with self.timed("open"):
+                vault = connect_agent(self.db_path) if use_agent else None
+                if vault is None:
+                    # Imported here so agent-backed commands skip the crypto and SQLCipher imports
+                    from ciphervault.core.vault import PasswordVault
+                    vault = PasswordVault(db_path = self.db_path)
+                self._vault = vault
+        return self._vault
+
+    def close(self):
+        if self._vault is not None:
+            with self.timed("close"):
+                # Commands that end the session have already closed the vault
+                if not getattr(self._vault, "locked", False):
+                    self._vault.lock()
+            self._vault = None
+        self.timings["total"] = time.perf_counter() - self._started
+        if self.show_timings:
+            click.echo(" ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.timings.items()), err=True)
+
+
+def start_session(vault):
+    """Start the CLI session for a vault just unlocked with the master password"""
+    timeout_str = vault.get_config("session_timeout")
+    SessionStore(vault.db_path, vault.session_key).start(int(timeout_str) if timeout_str else DEFAULT_SESSION_TIMEOUT)
+
+def open_vault(ctx, use_agent: bool = True):
+    """The invocation's shared vault (see VaultContext.open)"""
+    return ctx.obj.open(use_agent)
+
 def sessionTimeoutCheck(f):
     """
-    Check vault idle timeout and lock vault if idle too long.
+    Check vault idle timeout and lock vault if idle too long. Uses the
+    session file only, so the vault database is not opened here.
     """
     @functools.wraps(f)
     @click.pass_context
     def wrapper(ctx, *args, **kwargs):
-        if keyring.get_password("database_key","db_key") is None:
+        try:
+            return _checked_call(ctx.obj, f, *args, **kwargs)
+        except AgentError as e:
+            raise click.ClickException(str(e))
+    return wrapper
+
+def _checked_call(vault_ctx, f, *args, **kwargs):
+    """Run command f if the vault's session is valid and still fresh"""
+    with vault_ctx.timed("session_check"):
+        session_key = get_session_key()
+        if session_key is None:
+            clear_session_keys()
             click.echo("Vault is logged out. Please login again to access CipherVault")
             raise click.Abort()
-        vault = PasswordVault(db_path = resolve_vault_path(ctx.obj['db']))
-        # Get session timeout from config (default 60s)
-        timeout_str = vault.db.get_config("session_timeout")
-        timeout_seconds = int(timeout_str) if timeout_str else 60
-
-        now = datetime.datetime.utcnow()
-        last_used_str = vault.db.get_config("last_used")
-        if last_used_str:
-            last_used = datetime.datetime.fromisoformat(last_used_str)
-            idle_time = (now - last_used).total_seconds()
-            if idle_time > timeout_seconds:
-                vault.update_config("last_used", now.isoformat())
-                vault.close()
-                click.echo(f"Vault locked due to inactivity ({int(idle_time)} seconds idle). Please log in again.")
-                raise click.Abort()
-
-        # Update last_used timestamp
-        vault.update_config("last_used", now.isoformat())
+        store = SessionStore(vault_ctx.db_path, session_key)
+        session = store.load()
+        if session is None:
+            stop_agent(store.vault_path)
+            clear_session_keys()
+            store.clear()
+            click.echo("No valid session for this vault. Please log in again.")
+            raise click.Abort()
+        if store.is_expired(session):
+            idle_time = store.idle_seconds(session)
+            stop_agent(store.vault_path)
+            clear_session_keys()
+            store.clear()
+            click.echo(f"Vault locked due to inactivity ({int(idle_time)} seconds idle). Please log in again.")
+            raise click.Abort()
+        store.touch(session)
+    with vault_ctx.timed("command"):
         return f(*args, **kwargs)
-    return wrapper
\ No newline at end of file
@@ -0,0 +1,224 @@
+import os
+import json
+import stat
+import time
+import socket
+import struct
+import logging
+import functools
+import socketserver
+from ciphervault.core.session import runtime_path
+from ciphervault.core.batch import BatchExecutor, BATCH_TRANSACTION_SIZE
+
+# ssh-agent style daemon: one process keeps a vault unlocked with its
+# database open and serves PasswordVault calls as JSON lines over a Unix
+# socket (mode 0600, in the 0700 session directory, same-uid peers only).
+# It stops after the session timeout without requests, wiping its keys and
+# ending the CLI session.
+
+# PasswordVault methods callable through the agent
+AGENT_METHODS = frozenset({
+    "list_entries", "search", "get_entries_by_service", "get_entry_details", "find_entry",
+    "add_password_entry", "add_password_entries", "update_entry", "delete_entry",
+    "verify_master_password", "get_config", "change_seq", "poll_changes",
+})
+# Exceptions re-raised with their own type by the client
+AGENT_ERRORS = {error.__name__: error for error in (ValueError, RuntimeError, KeyError, TypeError)}
+# Seconds the CLI waits for a newly started agent to answer
+AGENT_START_TIMEOUT = 10
+
+
+class AgentError(RuntimeError):
+    """The agent failed a request or could not be reached"""
+
+
+def agent_socket_path(vault_path: str) -> str:
+    return runtime_path(vault_path, "sock")
+
+
+def _peer_uid(sock) -> int:
+    """uid of the process on the other end of a Unix socket, or None where unsupported"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    _, uid, _ = struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+    return uid
+
+
+class _AgentRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        peer_uid = _peer_uid(self.connection)
+        if peer_uid is not None and peer_uid != os.getuid():
+            logging.warning(f"Agent refused a connection from uid {peer_uid}")
+            return
+        for line in self.rfile:
+            response = self.server.agent.handle_request(line)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+            self.wfile.flush()
+            if not self.server.agent.running:
+                return
+
+
+class VaultAgent:
+    def __init__(self, vault, timeout_seconds: int, socket_path: str = None):
+        self.vault = vault
+        self.timeout_seconds = timeout_seconds
+        self.socket_path = socket_path or agent_socket_path(vault.db_path)
+        self.running = False
+        self.last_used = time.monotonic()
+
+    def handle_request(self, line: bytes) -> dict:
+        """Run one JSON request {"op": ..., "args": [...], "kwargs": {...}} and build its response"""
+        self.last_used = time.monotonic()
+        try:
+            request = json.loads(line)
+            op = request.get("op")
+            if op == "ping":
+                return {"ok": True, "result": self.timeout_seconds}
+            if op == "shutdown":
+                self.running = False
+                return {"ok": True, "result": None}
+            if op == "batch":
+                # (lines, first_line) of a 'cvault batch' stream, {"transaction_size": ...}
+                executor = BatchExecutor(self.vault, int(request.get("kwargs", {}).get("transaction_size", BATCH_TRANSACTION_SIZE)))
+                return {"ok": True, "result": list(executor.run(*request.get("args", ())))}
+            if op not in AGENT_METHODS:
+                raise ValueError(f"Unsupported agent operation: {op}")
+            result = getattr(self.vault, op)(*request.get("args", ()), **request.get("kwargs", {}))
+            return {"ok": True, "result": result}
+        except Exception as e:
+            return {"ok": False, "error": str(e), "type": type(e).__name__}
+
+    def _bind(self):
+        if os.path.exists(self.socket_path):
+            if connect_agent(self.vault.db_path) is not None:
+                raise AgentError("An agent is already running for this vault")
+            os.unlink(self.socket_path)
+        old_umask = os.umask(0o177)
+        try:
+            server = socketserver.UnixStreamServer(self.socket_path, _AgentRequestHandler)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.socket_path, 0o600)
+        server.agent = self
+        return server
+
+    def serve(self):
+        """Serve requests until shut down or idle for timeout_seconds"""
+        server = self._bind()
+        self.running = True
+        expired = False
+        logging.info(f"Vault agent listening on {self.socket_path}")
+        try:
+            while self.running:
+                remaining = self.timeout_seconds - (time.monotonic() - self.last_used)
+                if remaining <= 0:
+                    expired = True
+                    break
+                server.timeout = remaining
+                server.handle_request()
+        finally:
+            server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            if expired:
+                # Same as a CLI session timeout: wipe keys and end the session
+                self.vault.close()
+                logging.info("Vault agent stopped after the session timeout")
+            else:
+                self.vault.lock()
+                logging.info("Vault agent stopped")
+
+
+class AgentVaultProxy:
+    """
+    Client side of the agent with the PasswordVault calls the CLI uses.
+    Results come back as JSON, so tuples arrive as lists.
+    """
+    def __init__(self, sock):
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def _call(self, op: str, *args, **kwargs):
+        try:
+            self._file.write(json.dumps({"op": op, "args": args, "kwargs": kwargs}).encode('utf-8') + b"\n")
+            self._file.flush()
+            line = self._file.readline()
+        except OSError as e:
+            raise AgentError(f"Lost connection to the vault agent: {e}")
+        if not line:
+            raise AgentError("The vault agent closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise AGENT_ERRORS.get(response.get("type"), AgentError)(response["error"])
+        return response["result"]
+
+    def __getattr__(self, name):
+        if name in AGENT_METHODS:
+            return functools.partial(self._call, name)
+        raise AttributeError(name)
+
+    def ping(self) -> int:
+        """The agent's idle timeout in seconds"""
+        return self._call("ping")
+
+    def shutdown(self):
+        self._call("shutdown")
+        self.lock()
+
+    def run_batch(self, lines: list, first_line: int = 1, transaction_size: int = BATCH_TRANSACTION_SIZE) -> list:
+        """Results of BatchExecutor.run() for a chunk of batch lines, run inside the agent"""
+        return self._call("batch", lines, first_line, transaction_size=transaction_size)
+
+    def iter_entries(self, page_size: int = None):
+        yield from self.list_entries()
+
+    def iter_entry_pages(self, page_size: int = None):
+        yield self.list_entries()
+
+    def lock(self):
+        """Disconnect; the agent keeps the vault unlocked"""
+        self._file.close()
+        self._sock.close()
+
+
+def connect_agent(vault_path: str):
+    """
+    An AgentVaultProxy for the vault's running agent, or None if there is
+    none. The master password and decrypted entries go over this socket, so
+    both the socket file and the process serving it must belong to us.
+    """
+    socket_path = agent_socket_path(vault_path)
+    try:
+        st = os.lstat(socket_path)
+    except FileNotFoundError:
+        return None
+    if not stat.S_ISSOCK(st.st_mode) or (hasattr(os, "getuid") and st.st_uid != os.getuid()):
+        raise AgentError(f"Refusing to use {socket_path}: not a socket owned by the current user")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    peer_uid = _peer_uid(sock)
+    if peer_uid is not None and peer_uid != os.getuid():
+        sock.close()
+        raise AgentError(f"Refusing to talk to a vault agent run by uid {peer_uid}")
+    return AgentVaultProxy(sock)
+
+
+def stop_agent(vault_path: str) -> bool:
+    """Ask the vault's agent to stop; returns False if none was running"""
+    try:
+        proxy = connect_agent(vault_path)
+    except AgentError as e:
+        # Never talk to a socket we do not own, but let logout go ahead
+        logging.warning(str(e))
+        return False
+    if proxy is None:
+        return False
+    try:
+        proxy.shutdown()
+    except AgentError:
+        pass
+    return True
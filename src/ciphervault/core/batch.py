@@ -0,0 +1,224 @@
+import json
+import logging
+
+# Batch execution of newline-delimited JSON operations against one unlocked
+# vault, used by 'cvault batch' and the vault agent. Each input line is an
+# object with an "op" and its fields; an optional "ref" is echoed back:
+#
+#   {"op": "get", "service": ..., "username": ... | "entry_id": ..., "field": ...}
+#   {"op": "add", "service": ..., "username": ..., "password": ..., "notes": ..., "tags": [...]}
+#   {"op": "update", "service": ..., "username": ... | "entry_id": ..., "set": {"password": ..., ...}}
+#   {"op": "delete", "service": ..., "username": ... | "entry_id": ...}
+#   {"op": "search", "query": ..., "limit": ...}
+#
+# Every line gets one result, in input order: {"line", "ok", "result"} or
+# {"line", "ok": false, "error", "type"}. Consecutive writes share one
+# transaction (and runs of adds one encryption pass); their results are
+# released once it commits, so an "ok" is never reported for a write that
+# was rolled back.
+
+BATCH_OPS = frozenset({"get", "add", "update", "delete", "search"})
+BATCH_WRITE_OPS = frozenset({"add", "update", "delete"})
+# Writes committed per transaction
+BATCH_TRANSACTION_SIZE = 500
+# Entry fields a batch may read or set
+BATCH_FIELDS = ("service", "username", "password", "notes", "tags")
+# Raised for a bad request before anything is written; other errors during a
+# write roll back the whole transaction
+REQUEST_ERRORS = (ValueError, KeyError, TypeError)
+
+
+class BatchExecutor:
+    def __init__(self, vault, transaction_size: int = BATCH_TRANSACTION_SIZE):
+        self.vault = vault
+        self.transaction_size = transaction_size
+
+    def run(self, lines, first_line: int = 1):
+        """Execute JSON lines in order, yielding one result dict per non-blank line"""
+        group = []
+        for number, line in enumerate(lines, first_line):
+            if not line.strip():
+                continue
+            try:
+                request = self._parse(line)
+            except REQUEST_ERRORS as e:
+                yield from self._run_writes(group)
+                group = []
+                yield self._error(number, None, e)
+                continue
+            if request["op"] in BATCH_WRITE_OPS:
+                group.append((number, request))
+                if len(group) >= self.transaction_size:
+                    yield from self._run_writes(group)
+                    group = []
+            else:
+                # Reads see every earlier write, and their results are not held back
+                yield from self._run_writes(group)
+                group = []
+                yield self._run(number, request, Exception)
+        yield from self._run_writes(group)
+
+    @staticmethod
+    def _parse(line) -> dict:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("Each line must be a JSON object")
+        if request.get("op") not in BATCH_OPS:
+            raise ValueError(f"Unsupported batch operation: {request.get('op')}")
+        return request
+
+    @staticmethod
+    def _result(number: int, request: dict, result) -> dict:
+        response = {"line": number, "ok": True, "result": result}
+        if request.get("ref") is not None:
+            response["ref"] = request["ref"]
+        return response
+
+    @staticmethod
+    def _error(number: int, request: dict, error: Exception) -> dict:
+        response = {"line": number, "ok": False, "error": str(error), "type": type(error).__name__}
+        if request and request.get("ref") is not None:
+            response["ref"] = request["ref"]
+        return response
+
+    def _run(self, number: int, request: dict, catch) -> dict:
+        try:
+            return self._result(number, request, getattr(self, f"_{request['op']}")(request))
+        except catch as e:
+            return self._error(number, request, e)
+
+    def _run_writes(self, group: list) -> list:
+        """Run write requests in one transaction; returns their results once committed"""
+        if not group:
+            return []
+        results = []
+        adds = []
+        try:
+            with self.vault.db.transaction():
+                for number, request in group:
+                    if request["op"] == "add":
+                        try:
+                            adds.append((len(results), number, request, self._add_values(request)))
+                            results.append(None)
+                        except REQUEST_ERRORS as e:
+                            results.append(self._error(number, request, e))
+                        continue
+                    # Keep the input order for later writes to the added entries
+                    self._flush_adds(adds, results)
+                    results.append(self._run(number, request, REQUEST_ERRORS))
+                self._flush_adds(adds, results)
+        except Exception as e:
+            logging.error(f"Batch transaction rolled back: {e}")
+            error = RuntimeError(f"Transaction rolled back: {e}")
+            return [self._error(number, request, error) for number, request in group]
+        return results
+
+    def _flush_adds(self, adds: list, results: list):
+        if not adds:
+            return
+        ids = self.vault.add_password_entries([values for *_, values in adds])
+        for (position, number, request, _), entry_id in zip(adds, ids):
+            results[position] = self._result(number, request, {"entry_id": entry_id})
+        adds.clear()
+
+    def _entry_id(self, request: dict) -> str:
+        if request.get("entry_id"):
+            entry_id = request["entry_id"]
+            if self.vault.db.get_entry(entry_id) is None:
+                raise ValueError(f"No entry found with ID: {entry_id}")
+            return entry_id
+        service, username = request.get("service"), request.get("username")
+        if not service or not username:
+            raise ValueError("Needs entry_id, or service and username")
+        entry = self.vault.find_entry(service, username)
+        if entry is None:
+            raise ValueError(f"No entry found for service '{service}' and username '{username}'")
+        return entry["id"]
+
+    @staticmethod
+    def _fields(values: dict) -> dict:
+        unknown = set(values) - set(BATCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown entry field(s): {', '.join(sorted(unknown))}")
+        for name, value in values.items():
+            if name == "tags":
+                if not isinstance(value, list) or not all(isinstance(tag, str) for tag in value):
+                    raise TypeError("tags must be a list of strings")
+            elif not isinstance(value, str):
+                raise TypeError(f"{name} must be a string")
+        return values
+
+    def _add_values(self, request: dict) -> dict:
+        values = self._fields({name: request[name] for name in BATCH_FIELDS if name in request})
+        if not values.get("service") or not values.get("username"):
+            raise ValueError("add needs a service and a username")
+        return values
+
+    def _get(self, request: dict) -> dict:
+        field = request.get("field")
+        if field is not None and field not in BATCH_FIELDS:
+            raise ValueError(f"Unknown entry field: {field}")
+        entry_id = self._entry_id(request)
+        details = self.vault.get_entry_details(entry_id)
+        if field:
+            return {field: details[field]}
+        return {"entry_id": entry_id, **{name: details[name] for name in BATCH_FIELDS}}
+
+    def _update(self, request: dict) -> dict:
+        values = request.get("set")
+        if not isinstance(values, dict) or not values:
+            raise ValueError("update needs a non-empty 'set' object")
+        entry_id = self._entry_id(request)
+        self.vault.update_entry(entry_id, **self._fields(values))
+        return {"entry_id": entry_id}
+
+    def _delete(self, request: dict) -> dict:
+        entry_id = self._entry_id(request)
+        self.vault.delete_entry(entry_id)
+        return {"entry_id": entry_id}
+
+    def _search(self, request: dict) -> list:
+        query = request.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError("search needs a query")
+        return self.vault.search(query, limit=int(request.get("limit", 50)))
+
+
+def _is_write(line) -> bool:
+    try:
+        return BatchExecutor._parse(line)["op"] in BATCH_WRITE_OPS
+    except REQUEST_ERRORS:
+        return False
+
+
+def commit_chunks(lines, transaction_size: int = BATCH_TRANSACTION_SIZE):
+    """
+    Split a batch stream into (first_line, lines) chunks of about
+    transaction_size lines that end where BatchExecutor.run() commits, so
+    running the chunks one after another (as the agent does) commits in the
+    same places as running the whole stream at once.
+    """
+    chunk, first_line, writes = [], 1, 0
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            chunk.append(line)
+            continue
+        if _is_write(line):
+            chunk.append(line)
+            writes += 1
+            if writes < transaction_size:
+                continue
+            # The executor commits after this write
+            writes = 0
+        else:
+            # Reads and bad lines commit the writes before them
+            writes = 0
+            if len(chunk) >= transaction_size:
+                yield first_line, chunk
+                chunk, first_line = [], number
+            chunk.append(line)
+            continue
+        yield first_line, chunk
+        chunk, first_line = [], number + 1
+    if chunk:
+        yield first_line, chunk
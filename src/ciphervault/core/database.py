@@ -1,67 +1,144 @@
 import os
 import uuid
-from contextlib import closing
+from contextlib import closing, contextmanager
 import sqlcipher3.dbapi2 as sqlite
+from .encryption import EncryptedRecord
+from .migrations import migrate_schema
+
+# Connection PRAGMAs per named profile, applied at open time. The profile is
+# stored in vault_config ('db_profile'). cipher_page_size and WAL are part of
+# the file format and fixed for every profile. mmap_size is not offered:
+# SQLCipher decrypts pages into its own cache and cannot memory-map them.
+# Switching auto_vacuum between FULL and INCREMENTAL works on existing files;
+# files created with auto_vacuum NONE need a VACUUM before either applies.
+# Every profile vacuums incrementally (see incremental_vacuum()).
+PRAGMA_PROFILES = {
+    # Deleted entries are overwritten at once; freed pages are returned to the
+    # filesystem by maintenance slices rather than page moves on every commit
+    "paranoid": {
+        "secure_delete": "ON",
+        "auto_vacuum": "INCREMENTAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Overwrite deleted content when it costs no extra I/O. With WAL, NORMAL can
+    # lose the last commits on power loss but never corrupts the file
+    "balanced": {
+        "secure_delete": "FAST",
+        "auto_vacuum": "INCREMENTAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Bulk work on trusted storage: deleted content is only unlinked
+    "throughput": {
+        "secure_delete": "OFF",
+        "auto_vacuum": "INCREMENTAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+DEFAULT_PROFILE = "paranoid"
+# Most recent vault_changes rows kept by prune_changes()
+CHANGE_JOURNAL_SIZE = 10_000
+# Columns of the entry_search full-text index; written as a tuple in this order
+SEARCH_COLUMNS = ("service", "username", "notes", "tags")
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
 
 class SecurePasswordDatabase:
-    def __init__(self, db_path: str, encryption_key: bytes):
+    def __init__(self, db_path: str, encryption_key: bytes, profile: str = None):
+        """
+        profile sets the PRAGMA profile used until the vault's stored
+        'db_profile' is read (so it decides auto_vacuum for a new file).
+        """
         self.db_path = db_path
         self.encryption_key = encryption_key
+        self._tx_depth = 0
+        # vault_config mirror; reloaded when PRAGMA data_version shows a
+        # commit from another connection
+        self._config_cache = None
+        self._config_data_version = None
+        # (data_version, total_changes) at the last has_new_changes() call
+        self._poll_marker = None
+        self.profile = profile or DEFAULT_PROFILE
         self.conn = self._create_connection()
         self._initialize_database()
+        stored_profile = self.get_config("db_profile")
+        if stored_profile in PRAGMA_PROFILES and stored_profile != self.profile:
+            self.apply_profile(stored_profile)
 
     def _create_connection(self):
         conn = sqlite.connect(self.db_path)
         hex_key = self.encryption_key.hex()
+        # Raw keys skip SQLCipher's own PBKDF2, so kdf_iter is not set
         conn.execute(f"PRAGMA key = \"x'{hex_key}'\"")
         conn.execute("PRAGMA cipher_page_size = 4096")
-        conn.execute("PRAGMA kdf_iter = 256000")
+        # auto_vacuum only takes effect before the file header is written,
+        # which switching to WAL does, so the profile goes first
+        self._apply_pragmas(conn, self.profile)
         conn.execute("PRAGMA journal_mode = WAL")
         conn.execute("PRAGMA foreign_keys = ON")
-        conn.execute("PRAGMA secure_delete = ON")
-        conn.execute("PRAGMA auto_vacuum = FULL")
         return conn
 
+    @staticmethod
+    def _apply_pragmas(conn, profile: str):
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Unknown database profile: {profile}. Valid options: {', '.join(PRAGMA_PROFILES)}")
+        for pragma, value in PRAGMA_PROFILES[profile].items():
+            if pragma == "auto_vacuum":
+                # Assigning auto_vacuum rewrites the file header even when
+                # unchanged, which would make every open a write
+                current = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+                if AUTO_VACUUM_MODES.get(current) == value.lower():
+                    continue
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+    def apply_profile(self, profile: str):
+        """Apply a PRAGMA profile to the open connection (not persisted)"""
+        self._apply_pragmas(self.conn, profile)
+        self.profile = profile
+
+    def set_profile(self, profile: str):
+        """Apply a PRAGMA profile and store it for future opens"""
+        self.apply_profile(profile)
+        self.set_config("db_profile", profile)
+
     def _initialize_database(self):
-        with closing(self.conn.cursor()) as c:
-            # Create main entries table
-            c.execute("""
-            CREATE TABLE IF NOT EXISTS vault_entries (
-                id BLOB PRIMARY KEY,
-                nonce BLOB NOT NULL,
-                tag BLOB NOT NULL,
-                ciphertext BLOB NOT NULL,
-                algorithm TEXT NOT NULL CHECK(algorithm IN ('AES', 'CHA')),
-                algorithm_mechanism TEXT NOT NULL CHECK(algorithm_mechanism IN ('aes', 'chacha', 'hybrid')),
-                associated_data TEXT,
-                created_at TIMESTAMP DEFAULT (STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')),
-                updated_at TIMESTAMP DEFAULT (STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW'))
-            ) WITHOUT ROWID;
-            """)
-            
-            # Create configuration table
-            c.execute("""
-            CREATE TABLE IF NOT EXISTS vault_config (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            ) WITHOUT ROWID;
-            """)
-            
-            # Create triggers
-            c.execute("""
-            CREATE TRIGGER IF NOT EXISTS update_timestamp
-            AFTER UPDATE ON vault_entries
-            FOR EACH ROW
-            BEGIN
-                UPDATE vault_entries SET updated_at = STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')
-                WHERE id = OLD.id;
-            END;
-            """)
-        self.conn.commit()
+        """Create the schema, or bring an older vault's schema up to date"""
+        self.schema_version = migrate_schema(self)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes into a single commit. Nested calls join the outer
+        transaction; the outermost one commits, or rolls back on error.
+        """
+        self._tx_depth += 1
+        try:
+            yield self.conn
+        except BaseException:
+            self._tx_depth -= 1
+            if self._tx_depth == 0:
+                self.conn.rollback()
+                self._config_cache = None
+            raise
+        self._tx_depth -= 1
+        if self._tx_depth == 0:
+            self.conn.commit()
+
+    def _commit(self):
+        """Commit unless an enclosing transaction() will do it"""
+        if not self._tx_depth:
+            self.conn.commit()
 
     def change_db_key(self, new_enc_key: bytes):
         c = self.conn.cursor()
-        c.execute(f"PRAGMA key = \"x'{self.encryption_key.hex()}'\"")
         try:
             c.execute("SELECT count(*) FROM vault_config;")
         except Exception as e:
@@ -69,147 +146,481 @@ class SecurePasswordDatabase:
             raise RuntimeError("Old password is incorrect or database is not SQLCipher-encrypted.") from e
         # Change the encryption key
         c.execute(f"PRAGMA rekey = \"x'{new_enc_key.hex()}'\"")
+        c.close()
         self.conn.commit()
+        self.encryption_key = new_enc_key
+
+    @staticmethod
+    def _split_encrypted(encrypted_data) -> tuple:
+        """
+        Split cipher output into (algo_id, nonce, ciphertext, tag). Accepts an
+        EncryptedRecord as-is or prefixed bytes, which are sliced as views.
+        """
+        if not isinstance(encrypted_data, EncryptedRecord):
+            try:
+                encrypted_data = EncryptedRecord.from_bytes(encrypted_data)
+            except ValueError:
+                raise ValueError("Invalid algorithm identifier")
+        return encrypted_data
+
+    @staticmethod
+    def _metadata_blob(metadata):
+        """Stored form of an encrypted metadata record (prefixed bytes, or None)"""
+        if metadata is None or isinstance(metadata, (bytes, bytearray)):
+            return metadata
+        return metadata.to_bytes()
+
+    @staticmethod
+    def _metadata_record(blob):
+        return EncryptedRecord.from_bytes(blob) if blob is not None else None
+
+    @staticmethod
+    def _entry_id_hex(entry_id: bytes) -> str:
+        """Entry ids are handed out as uppercase hex, the form SQLite's hex(id) gives the read queries"""
+        return entry_id.hex().upper()
 
     def add_entry(self, encrypted_data: bytes, context: str = "",
-                 algorithm_mechanism: str = "hybrid") -> str:
-        algo_id = encrypted_data[:3].decode()
-        if algo_id not in ("AES", "CHA"):
-            raise ValueError("Invalid algorithm identifier")
-        
-        if algo_id == "AES":
-            nonce = encrypted_data[3:19]
-            ciphertext = encrypted_data[19:-16]
-            tag = encrypted_data[-16:]
-        else:  # CHA
-            nonce = encrypted_data[3:15]
-            ciphertext = encrypted_data[15:-16]
-            tag = encrypted_data[-16:]
-        
+                 algorithm_mechanism: str = "hybrid", metadata=None,
+                 service_idx: bytes = None, username_idx: bytes = None,
+                 search: tuple = None) -> str:
+        """search holds the entry's SEARCH_COLUMNS values for the full-text index"""
+        algo_id, nonce, ciphertext, tag = self._split_encrypted(encrypted_data)
         entry_id = uuid.uuid4().bytes
         with closing(self.conn.cursor()) as c:
+            search_rowid = self._insert_search(c, entry_id, search)
             c.execute("""
             INSERT INTO vault_entries 
-                (id, nonce, tag, ciphertext, algorithm, algorithm_mechanism, associated_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (entry_id, nonce, tag, ciphertext, algo_id, algorithm_mechanism, context))
-        self.conn.commit()
-        return entry_id.hex()
+                (id, nonce, tag, ciphertext, algorithm, algorithm_mechanism, associated_data, metadata,
+                 service_idx, username_idx, search_rowid)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (entry_id, nonce, tag, ciphertext, algo_id, algorithm_mechanism, context,
+                  self._metadata_blob(metadata), service_idx, username_idx, search_rowid))
+        self._commit()
+        return self._entry_id_hex(entry_id)
 
-    def get_config(self, key: str) -> str:
+    def add_entries(self, entries) -> list:
+        """
+        Insert many entries with one executemany. entries is an iterable of
+        (record, context, algorithm_mechanism, metadata, service_idx,
+        username_idx, search); returns the new ids (hex) in input order.
+        """
+        rows = []
         with closing(self.conn.cursor()) as c:
-            c.execute("SELECT value FROM vault_config WHERE key = ?", (key,))
-            result = c.fetchone()
-        return result[0] if result else None
+            for encrypted_data, context, algorithm_mechanism, metadata, service_idx, username_idx, search in entries:
+                algo_id, nonce, ciphertext, tag = self._split_encrypted(encrypted_data)
+                entry_id = uuid.uuid4().bytes
+                rows.append((entry_id, nonce, tag, ciphertext, algo_id, algorithm_mechanism, context,
+                             self._metadata_blob(metadata), service_idx, username_idx,
+                             self._insert_search(c, entry_id, search)))
+            c.executemany("""
+            INSERT INTO vault_entries
+                (id, nonce, tag, ciphertext, algorithm, algorithm_mechanism, associated_data, metadata,
+                 service_idx, username_idx, search_rowid)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        self._commit()
+        return [self._entry_id_hex(row[0]) for row in rows]
+
+    @staticmethod
+    def _insert_search(c, entry_id: bytes, search: tuple):
+        """Add an entry's row to the full-text index; returns its rowid, or None without search values"""
+        if search is None:
+            return None
+        c.execute("""
+        INSERT INTO entry_search (entry_id, service, username, notes, tags)
+        VALUES (?, ?, ?, ?, ?)
+        """, (entry_id, *search))
+        return c.lastrowid
+
+    def _write_search(self, c, entry_id: bytes, search: tuple):
+        """Replace an existing entry's row in the full-text index"""
+        c.execute("SELECT search_rowid FROM vault_entries WHERE id = ?", (entry_id,))
+        row = c.fetchone()
+        if row is None:
+            return
+        if row[0] is not None:
+            c.execute("DELETE FROM entry_search WHERE rowid = ?", (row[0],))
+        c.execute("UPDATE vault_entries SET search_rowid = ? WHERE id = ?",
+                  (self._insert_search(c, entry_id, search), entry_id))
+
+    def search_tokenizer(self) -> str:
+        """Tokenizer of the entry_search index: 'trigram', or 'unicode61' on builds without it"""
+        if not hasattr(self, '_search_tokenizer'):
+            with closing(self.conn.cursor()) as c:
+                c.execute("SELECT sql FROM sqlite_master WHERE name = 'entry_search'")
+                self._search_tokenizer = "trigram" if "trigram" in c.fetchone()[0] else "unicode61"
+        return self._search_tokenizer
+
+    def _search_filter(self, query: str) -> tuple:
+        """
+        WHERE clause, parameters and ORDER BY for entries matching every
+        whitespace-separated term of query. The trigram index cannot match
+        terms under three characters, so those are LIKE filters instead.
+        """
+        trigram = self.search_tokenizer() == "trigram"
+        terms = query.split()
+        match_terms = [term for term in terms if not trigram or len(term) >= 3]
+        clauses, params = [], []
+        if match_terms:
+            # Quoted as phrases so FTS5 query syntax in the input is literal
+            suffix = "" if trigram else "*"
+            clauses.append("entry_search MATCH ?")
+            params.append(" ".join('"' + term.replace('"', '""') + '"' + suffix for term in match_terms))
+        for term in terms:
+            if trigram and len(term) < 3:
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                clauses.append("(" + " OR ".join(f"entry_search.{column} LIKE ? ESCAPE '\\'"
+                                                 for column in SEARCH_COLUMNS) + ")")
+                params += [pattern] * len(SEARCH_COLUMNS)
+        order = "entry_search.rank" if match_terms else "associated_data"
+        return " AND ".join(clauses), params, order
+
+    def search_entries(self, query: str, limit: int = 50) -> list:
+        """
+        Entries whose service, username, notes or tags match query, best
+        matches first; same dict shape as get_entries_by_service()
+        """
+        if not query.split():
+            return []
+        where, params, order = self._search_filter(query)
+        with closing(self.conn.cursor()) as c:
+            c.execute(f"""
+            SELECT {self._ENTRY_COLUMNS}
+            FROM entry_search JOIN vault_entries ON vault_entries.id = entry_search.entry_id
+            WHERE {where}
+            ORDER BY {order}
+            LIMIT ?
+            """, (*params, limit))
+            return self._entry_rows(c.fetchall())
+
+    def _config(self) -> dict:
+        """The cached vault_config table, reloaded if another connection committed since it was read"""
+        if self._config_cache is not None and self.conn.in_transaction:
+            # Other connections' commits are invisible until ours ends
+            return self._config_cache
+        with closing(self.conn.cursor()) as c:
+            c.execute("PRAGMA data_version")
+            data_version = c.fetchone()[0]
+            if self._config_cache is None or data_version != self._config_data_version:
+                c.execute("SELECT key, value FROM vault_config")
+                self._config_cache = dict(c.fetchall())
+                self._config_data_version = data_version
+        return self._config_cache
+
+    def get_config(self, key: str) -> str:
+        return self._config().get(key)
 
     def set_config(self, key: str, value: str):
+        self.set_configs({key: value})
+
+    def set_configs(self, values: dict):
+        """Write several config keys in one commit"""
+        config = self._config()
         with closing(self.conn.cursor()) as c:
-            c.execute("""
+            c.executemany("""
             INSERT OR REPLACE INTO vault_config (key, value)
             VALUES (?, ?)
-            """, (key, value))
-        self.conn.commit()
+            """, list(values.items()))
+        self._commit()
+        config.update(values)
 
-    def get_entries_by_service(self, service: str) -> list:
-        """Get all entries for a service (non-unique)"""
+    def delete_config(self, key: str):
+        config = self._config()
         with closing(self.conn.cursor()) as c:
-            c.execute("""
-            SELECT hex(id), nonce, tag, ciphertext, algorithm, algorithm_mechanism, associated_data
-            FROM vault_entries WHERE associated_data = ?
-            """, (service,))
-            results = c.fetchall()
-        
+            c.execute("DELETE FROM vault_config WHERE key = ?", (key,))
+        self._commit()
+        config.pop(key, None)
+
+    _ENTRY_COLUMNS = """
+        hex(id), nonce, tag, ciphertext, algorithm, algorithm_mechanism, associated_data,
+        metadata, created_at, updated_at
+    """
+
+    def _entry_rows(self, rows) -> list:
         entries = []
-        for row in results:
-            entry_id, nonce, tag, ciphertext, algo_id, algo_mech, context = row
-            algo_prefix = algo_id.encode()
-            encrypted_data = algo_prefix + nonce + ciphertext + tag
+        for row in rows:
+            entry_id, nonce, tag, ciphertext, algo_id, algo_mech, context, metadata, created, updated = row
             entries.append({
                 'id': entry_id,
-                'encrypted_data': encrypted_data,
+                'service': context,
+                'record': EncryptedRecord(algo_id, nonce, ciphertext, tag),
+                'metadata': self._metadata_record(metadata),
                 'algorithm': algo_id,
                 'algorithm_mechanism': algo_mech,
-                'context': context
+                'context': context,
+                'created_at': created,
+                'updated_at': updated
             })
         return entries
 
+    def get_entries_by_service(self, service: str, service_idx: bytes = None) -> list:
+        """
+        Get all entries for a service (non-unique). With the service's blind
+        index this is an indexed read instead of a table scan.
+        """
+        with closing(self.conn.cursor()) as c:
+            if service_idx is not None:
+                c.execute(f"""
+                SELECT {self._ENTRY_COLUMNS}
+                FROM vault_entries WHERE service_idx = ? AND associated_data = ?
+                """, (service_idx, service))
+            else:
+                c.execute(f"""
+                SELECT {self._ENTRY_COLUMNS}
+                FROM vault_entries WHERE associated_data = ?
+                """, (service,))
+            return self._entry_rows(c.fetchall())
+
+    def find_entries(self, service_idx: bytes, username_idx: bytes) -> list:
+        """Entries matching both blind indexes, same dict shape as get_entries_by_service()"""
+        with closing(self.conn.cursor()) as c:
+            c.execute(f"""
+            SELECT {self._ENTRY_COLUMNS}
+            FROM vault_entries WHERE service_idx = ? AND username_idx = ?
+            """, (service_idx, username_idx))
+            return self._entry_rows(c.fetchall())
+
     def get_entry(self, entry_id: str) -> dict:
         entry_id_bytes = bytes.fromhex(entry_id)
         with closing(self.conn.cursor()) as c:
             c.execute("""
-            SELECT nonce, tag, ciphertext, algorithm, algorithm_mechanism, associated_data
+            SELECT nonce, tag, ciphertext, algorithm, algorithm_mechanism, associated_data,
+                   metadata, created_at, updated_at
             FROM vault_entries WHERE id = ?
             """, (entry_id_bytes,))
             result = c.fetchone()
         if not result:
             return None
-        nonce, tag, ciphertext, algo_id, algo_mech, context = result
-        algo_prefix = algo_id.encode()
-        encrypted_data = algo_prefix + nonce + ciphertext + tag
+        nonce, tag, ciphertext, algo_id, algo_mech, context, metadata, created, updated = result
         return {
             'id': entry_id,
-            'encrypted_data': encrypted_data,
+            'record': EncryptedRecord(algo_id, nonce, ciphertext, tag),
+            'metadata': self._metadata_record(metadata),
             'algorithm': algo_id,
             'algorithm_mechanism': algo_mech,
-            'context': context
+            'context': context,
+            'created_at': created,
+            'updated_at': updated
         }
 
     def get_all_entries(self) -> list:
-        """Get all entries with encrypted data constructed for decryption"""
+        """The whole vault as one list of _entry_rows() dicts; prefer iter_entry_pages() for large vaults"""
+        return [entry for page in self.iter_entry_pages() for entry in page]
+
+    def get_entries_after(self, after_id: str = None, limit: int = 500) -> list:
+        """
+        Keyset page of entries ordered by id, starting after after_id (hex).
+        Same dict shape as _entry_rows().
+        """
         with closing(self.conn.cursor()) as c:
-            c.execute("""
-                SELECT hex(id), associated_data, algorithm, nonce, ciphertext, tag, algorithm_mechanism
-                FROM vault_entries
-            """)
-            entries = []
-            for row in c.fetchall():
-                id_hex, service, algo_id, nonce, ciphertext, tag, algo_mech = row
-                # Construct encrypted_data in same format as get_entry()
-                algo_prefix = algo_id.encode()
-                encrypted_data = algo_prefix + nonce + ciphertext + tag
-                entries.append({
-                    'id': id_hex,
-                    'service': service,
-                    'encrypted_data': encrypted_data,
-                    'algorithm_mechanism': algo_mech
-                })
-            return entries
+            c.execute(f"""
+            SELECT {self._ENTRY_COLUMNS}
+            FROM vault_entries WHERE id > ? ORDER BY id LIMIT ?
+            """, (bytes.fromhex(after_id) if after_id else b'', limit))
+            return self._entry_rows(c.fetchall())
+
+    def iter_entry_pages(self, page_size: int = 500, after_id: str = None):
+        """
+        Yield the vault as keyset pages (lists of _entry_rows() dicts) in
+        id order. Only one page of rows is held at a time.
+        """
+        while True:
+            page = self.get_entries_after(after_id, page_size)
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            after_id = page[-1]['id']
+
+    def count_entries(self, after_id: str = None) -> int:
+        with closing(self.conn.cursor()) as c:
+            c.execute("SELECT count(*) FROM vault_entries WHERE id > ?",
+                      (bytes.fromhex(after_id) if after_id else b'',))
+            return c.fetchone()[0]
+
+    def get_entries_by_ids(self, entry_ids: list, chunk_size: int = 500) -> list:
+        """Entries with the given ids (hex) that still exist, same dict shape as get_entries_by_service()"""
+        entries = []
+        with closing(self.conn.cursor()) as c:
+            for start in range(0, len(entry_ids), chunk_size):
+                chunk = [bytes.fromhex(entry_id) for entry_id in entry_ids[start:start + chunk_size]]
+                c.execute(f"""
+                SELECT {self._ENTRY_COLUMNS}
+                FROM vault_entries WHERE id IN ({", ".join("?" * len(chunk))})
+                """, chunk)
+                entries += self._entry_rows(c.fetchall())
+        return entries
+
+    def change_seq(self) -> int:
+        """Sequence number of the latest journaled entry change (0 if none)"""
+        with closing(self.conn.cursor()) as c:
+            c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'vault_changes'")
+            row = c.fetchone()
+        return row[0] if row else 0
+
+    def has_new_changes(self) -> bool:
+        """
+        Cheap check for commits since the previous call: PRAGMA data_version
+        moves on other connections' commits, total_changes on this one's.
+        """
+        with closing(self.conn.cursor()) as c:
+            c.execute("PRAGMA data_version")
+            marker = (c.fetchone()[0], self.conn.total_changes)
+        changed = marker != self._poll_marker
+        self._poll_marker = marker
+        return changed
+
+    def reset_change_marker(self):
+        """Make the next has_new_changes() call report changes"""
+        self._poll_marker = None
+
+    def changes_since(self, seq: int) -> list:
+        """
+        Journaled entry changes after seq as (seq, op, entry_id) tuples in
+        order, op being 'insert', 'update' or 'delete'. Returns None if
+        prune_changes() has dropped changes after seq.
+        """
+        if seq < int(self.get_config("changes_pruned_seq") or 0):
+            return None
+        with closing(self.conn.cursor()) as c:
+            c.execute("SELECT seq, op, hex(entry_id) FROM vault_changes WHERE seq > ? ORDER BY seq", (seq,))
+            return c.fetchall()
+
+    def prune_changes(self, keep: int = CHANGE_JOURNAL_SIZE) -> int:
+        """Drop all but the latest keep journal rows; returns the number removed"""
+        pruned_seq = self.change_seq() - keep
+        if pruned_seq <= int(self.get_config("changes_pruned_seq") or 0):
+            return 0
+        with self.transaction():
+            with closing(self.conn.cursor()) as c:
+                c.execute("DELETE FROM vault_changes WHERE seq <= ?", (pruned_seq,))
+                removed = c.rowcount
+            self.set_config("changes_pruned_seq", str(pruned_seq))
+        return removed
+
+    def count_entries_without_metadata(self) -> int:
+        with closing(self.conn.cursor()) as c:
+            c.execute("SELECT count(*) FROM vault_entries WHERE metadata IS NULL")
+            return c.fetchone()[0]
+
+    def get_entries_without_metadata(self, limit: int = 500) -> list:
+        """Entries written before metadata was stored separately, same dict shape as _entry_rows()"""
+        with closing(self.conn.cursor()) as c:
+            c.execute(f"""
+            SELECT {self._ENTRY_COLUMNS}
+            FROM vault_entries WHERE metadata IS NULL ORDER BY id LIMIT ?
+            """, (limit,))
+            return self._entry_rows(c.fetchall())
+
+    def set_metadata(self, updates) -> None:
+        """Store encrypted metadata for many entries; updates is an iterable of (entry_id, metadata)"""
+        with closing(self.conn.cursor()) as c:
+            c.executemany("UPDATE vault_entries SET metadata = ? WHERE id = ?", [
+                (self._metadata_blob(metadata), bytes.fromhex(entry_id))
+                for entry_id, metadata in updates
+            ])
+        self._commit()
+
+    # Both blind indexes are written together, so testing service_idx alone
+    # finds unindexed entries with a seek on idx_entries_blind; adding
+    # "OR username_idx IS NULL" turns the check on every unlock into a scan.
+    def count_entries_without_index(self) -> int:
+        with closing(self.conn.cursor()) as c:
+            c.execute("SELECT count(*) FROM vault_entries WHERE service_idx IS NULL")
+            return c.fetchone()[0]
+
+    def get_entries_without_index(self, limit: int = 500) -> list:
+        """Entries missing their blind indexes, same dict shape as _entry_rows()"""
+        with closing(self.conn.cursor()) as c:
+            c.execute(f"""
+            SELECT {self._ENTRY_COLUMNS}
+            FROM vault_entries WHERE service_idx IS NULL ORDER BY id LIMIT ?
+            """, (limit,))
+            return self._entry_rows(c.fetchall())
+
+    def set_blind_indexes(self, updates) -> None:
+        """Store blind indexes for many entries; updates is an iterable of (entry_id, service_idx, username_idx)"""
+        with closing(self.conn.cursor()) as c:
+            c.executemany("UPDATE vault_entries SET service_idx = ?, username_idx = ? WHERE id = ?", [
+                (service_idx, username_idx, bytes.fromhex(entry_id))
+                for entry_id, service_idx, username_idx in updates
+            ])
+        self._commit()
+
+    def count_entries_without_search(self) -> int:
+        with closing(self.conn.cursor()) as c:
+            c.execute("SELECT count(*) FROM vault_entries WHERE search_rowid IS NULL")
+            return c.fetchone()[0]
+
+    def get_entries_without_search(self, limit: int = 500) -> list:
+        """Entries missing from the full-text index, same dict shape as get_entries_by_service()"""
+        with closing(self.conn.cursor()) as c:
+            c.execute(f"""
+            SELECT {self._ENTRY_COLUMNS}
+            FROM vault_entries WHERE search_rowid IS NULL ORDER BY id LIMIT ?
+            """, (limit,))
+            return self._entry_rows(c.fetchall())
+
+    def set_search_entries(self, updates) -> None:
+        """Index many entries for full-text search; updates is an iterable of (entry_id, search)"""
+        with closing(self.conn.cursor()) as c:
+            for entry_id, search in updates:
+                self._write_search(c, bytes.fromhex(entry_id), search)
+        self._commit()
 
     def update_entry(self, entry_id: str, encrypted_data: bytes, context: str,
-                    algorithm_mechanism: str) -> None:
+                    algorithm_mechanism: str, metadata=None,
+                    service_idx: bytes = None, username_idx: bytes = None,
+                    search: tuple = None) -> None:
         entry_id_bytes = bytes.fromhex(entry_id)
-        algo_id = encrypted_data[:3].decode()
-        if algo_id not in ("AES", "CHA"):
-            raise ValueError("Invalid algorithm identifier")
-            
-        if algo_id == "AES":
-            nonce = encrypted_data[3:19]
-            ciphertext = encrypted_data[19:-16]
-            tag = encrypted_data[-16:]
-        else:  # CHA
-            nonce = encrypted_data[3:15]
-            ciphertext = encrypted_data[15:-16]
-            tag = encrypted_data[-16:]
-        
+        algo_id, nonce, ciphertext, tag = self._split_encrypted(encrypted_data)
         with closing(self.conn.cursor()) as c:
+            if search is not None:
+                self._write_search(c, entry_id_bytes, search)
             c.execute("""
             UPDATE vault_entries
             SET nonce = ?, tag = ?, ciphertext = ?, algorithm = ?,
-                algorithm_mechanism = ?, associated_data = ?
+                algorithm_mechanism = ?, associated_data = ?, metadata = ?,
+                service_idx = ?, username_idx = ?
             WHERE id = ?
-            """, (nonce, tag, ciphertext, algo_id, algorithm_mechanism, context, entry_id_bytes))
-        self.conn.commit()
+            """, (nonce, tag, ciphertext, algo_id, algorithm_mechanism, context,
+                  self._metadata_blob(metadata), service_idx, username_idx, entry_id_bytes))
+        self._commit()
+
+    def update_entries(self, updates) -> None:
+        """
+        Re-encrypt many entries with one executemany. updates is an iterable
+        of (entry_id, record, algorithm_mechanism, metadata, service_idx,
+        username_idx) where record is an EncryptedRecord or prefixed bytes;
+        contexts are kept.
+        """
+        rows = []
+        for entry_id, encrypted_data, algorithm_mechanism, metadata, service_idx, username_idx in updates:
+            algo_id, nonce, ciphertext, tag = self._split_encrypted(encrypted_data)
+            rows.append((nonce, tag, ciphertext, algo_id, algorithm_mechanism,
+                         self._metadata_blob(metadata), service_idx, username_idx,
+                         bytes.fromhex(entry_id)))
+        with closing(self.conn.cursor()) as c:
+            c.executemany("""
+            UPDATE vault_entries
+            SET nonce = ?, tag = ?, ciphertext = ?, algorithm = ?, algorithm_mechanism = ?, metadata = ?,
+                service_idx = ?, username_idx = ?
+            WHERE id = ?
+            """, rows)
+        self._commit()
 
     def delete_entry(self, entry_id: str):
         entry_id_bytes = bytes.fromhex(entry_id)
         with closing(self.conn.cursor()) as c:
             c.execute("DELETE FROM vault_entries WHERE id = ?", (entry_id_bytes,))
-        self.conn.commit()
+        self._commit()
 
     def close(self):
         if hasattr(self, 'conn') and self.conn:
             self.conn.close()
             self.conn = None
+            self._config_cache = None
 
     def __enter__(self):
         return self
@@ -217,6 +628,44 @@ class SecurePasswordDatabase:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    def maintenance_stats(self) -> dict:
+        """Page counts and auto_vacuum mode of the open database"""
+        with closing(self.conn.cursor()) as c:
+            page_count = c.execute("PRAGMA page_count").fetchone()[0]
+            freelist_count = c.execute("PRAGMA freelist_count").fetchone()[0]
+            auto_vacuum = c.execute("PRAGMA auto_vacuum").fetchone()[0]
+        return {
+            'page_count': page_count,
+            'freelist_count': freelist_count,
+            'auto_vacuum': AUTO_VACUUM_MODES.get(auto_vacuum, str(auto_vacuum)),
+        }
+
+    def incremental_vacuum(self, max_pages: int) -> int:
+        """Return up to max_pages free pages to the filesystem; returns the number reclaimed"""
+        with closing(self.conn.cursor()) as c:
+            before = c.execute("PRAGMA freelist_count").fetchone()[0]
+            # The pragma frees one page per step, so its rows must be consumed
+            c.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+            self._commit()
+            after = c.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
+
+    def wal_checkpoint(self, mode: str = "PASSIVE") -> tuple:
+        """
+        Checkpoint the WAL. PASSIVE never waits on readers; TRUNCATE also
+        resets the WAL file to zero bytes. Returns (busy, wal_frames, checkpointed_frames).
+        """
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+        with closing(self.conn.cursor()) as c:
+            return tuple(c.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+    def enable_incremental_vacuum(self):
+        """Rebuild a file created without auto_vacuum so incremental_vacuum() works on it"""
+        with closing(self.conn.cursor()) as c:
+            c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.vacuum()
+
     def vacuum(self):
         with closing(self.conn.cursor()) as c:
             c.execute("VACUUM")
@@ -1,16 +1,71 @@
 import os
+import json
 import platform
-import subprocess
+import time
+import hmac
+import hashlib
+import unicodedata
+from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+import Cryptodome
 from Cryptodome.Cipher import ChaCha20_Poly1305, AES
 from Cryptodome.Protocol.KDF import PBKDF2, HKDF
 from Cryptodome.Hash import SHA256
 from zeroize import zeroize1
 
+# Below this many records a thread pool costs more than it saves
+PARALLEL_DECRYPT_THRESHOLD = 2000
+
+KDF_PBKDF2 = "pbkdf2-sha256"
+KDF_ARGON2ID = "argon2id"
+# Parameters of vaults created before the KDF became configurable
+LEGACY_KDF_PARAMS = {"kdf": KDF_PBKDF2, "iterations": 120_000}
+DEFAULT_UNLOCK_MS = 500
+
+# Per-machine result of the AES-GCM vs ChaCha20-Poly1305 micro-benchmark used by "hybrid"
+CIPHER_PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".ciphervault", "cipher_profile.json")
+# Typical serialized entry sizes (bytes) the benchmark is run at
+PROFILE_RECORD_SIZES = (64, 256, 1024)
+_cipher_profile = None
+
+# Nonce length per stored algorithm identifier; every tag is 16 bytes
+NONCE_SIZES = {'AES': 16, 'CHA': 12}
+
+
+class EncryptedRecord(NamedTuple):
+    """
+    Cipher output kept as separate parts, matching the vault_entries columns.
+    Parts can be any bytes-like object (cursor bytes or memoryviews), so a row
+    is handed to the cipher without being concatenated and sliced again.
+    """
+    algorithm: str  # 'AES' or 'CHA'
+    nonce: bytes
+    ciphertext: bytes
+    tag: bytes
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'EncryptedRecord':
+        """Split prefixed cipher output (algorithm + nonce + ciphertext + tag) into views"""
+        view = memoryview(data)
+        algorithm = bytes(view[:3]).decode(errors='replace')
+        nonce_size = NONCE_SIZES.get(algorithm)
+        if nonce_size is None:
+            raise ValueError("Unsupported algorithm prefix")
+        return cls(algorithm, view[3:3 + nonce_size], view[3 + nonce_size:-16], view[-16:])
+
+    def to_bytes(self) -> bytes:
+        return self.algorithm.encode() + bytes(self.nonce) + bytes(self.ciphertext) + bytes(self.tag)
+
+
 class ChaCha20Poly1305Cipher:
     def __init__(self, key: bytes):
         if len(key) != 32:
             raise ValueError("Key must be 32 bytes (256 bits) long")
-        self.key = key
+        # Own mutable copy so clear() can wipe it
+        self.key = bytearray(key)
+
+    def clear(self):
+        zeroize1(self.key)
     
     def encrypt(self, plaintext: bytes, associated_data: bytes = b'') -> bytes:
         cipher = ChaCha20_Poly1305.new(key=self.key)
@@ -26,11 +81,38 @@ class ChaCha20Poly1305Cipher:
         cipher.update(associated_data)
         return cipher.decrypt_and_verify(ciphertext, tag)
 
+    def encrypt_many(self, items) -> list:
+        """Encrypt (plaintext, associated_data) pairs into (nonce, ciphertext, tag) tuples, in input order"""
+        key = self.key
+        new = ChaCha20_Poly1305.new
+        results = []
+        for plaintext, associated_data in items:
+            cipher = new(key=key)
+            cipher.update(associated_data)
+            ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+            results.append((cipher.nonce, ciphertext, tag))
+        return results
+
+    def decrypt_many(self, items) -> list:
+        """Decrypt ((nonce, ciphertext, tag), associated_data) pairs; parts may be memoryviews"""
+        key = self.key
+        new = ChaCha20_Poly1305.new
+        results = []
+        for (nonce, ciphertext, tag), associated_data in items:
+            cipher = new(key=key, nonce=nonce)
+            cipher.update(associated_data)
+            results.append(cipher.decrypt_and_verify(ciphertext, tag))
+        return results
+
 class AESGCMCipher:
     def __init__(self, key: bytes):
         if len(key) != 32:
             raise ValueError("Key must be 32 bytes (256 bits) long")
-        self.key = key
+        # Own mutable copy so clear() can wipe it
+        self.key = bytearray(key)
+
+    def clear(self):
+        zeroize1(self.key)
     
     def encrypt(self, plaintext: bytes, associated_data: bytes = b'') -> bytes:
         cipher = AES.new(self.key, AES.MODE_GCM)
@@ -46,62 +128,73 @@ class AESGCMCipher:
         cipher.update(associated_data)
         return cipher.decrypt_and_verify(ciphertext, tag)
 
+    def encrypt_many(self, items) -> list:
+        """Encrypt (plaintext, associated_data) pairs into (nonce, ciphertext, tag) tuples, in input order"""
+        key = self.key
+        new = AES.new
+        mode = AES.MODE_GCM
+        results = []
+        for plaintext, associated_data in items:
+            cipher = new(key, mode)
+            cipher.update(associated_data)
+            ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+            results.append((cipher.nonce, ciphertext, tag))
+        return results
+
+    def decrypt_many(self, items) -> list:
+        """Decrypt ((nonce, ciphertext, tag), associated_data) pairs; parts may be memoryviews"""
+        key = self.key
+        new = AES.new
+        mode = AES.MODE_GCM
+        results = []
+        for (nonce, ciphertext, tag), associated_data in items:
+            cipher = new(key, mode, nonce=nonce)
+            cipher.update(associated_data)
+            results.append(cipher.decrypt_and_verify(ciphertext, tag))
+        return results
+
 class HybridEncryptionManager:
-    def __init__(self, password: str, salt: bytes, algorithm: str = "hybrid"):
+    def __init__(self, aes_key: bytes, chacha_key: bytes, algorithm: str = "hybrid"):
         """
-        Initialize with algorithm selection:
+        Keys come from the vault's KeyDerivation, which applies its stored
+        KDF parameters. Algorithm selection:
         - 'aes': Always use AES-256-GCM
         - 'chacha': Always use ChaCha20-Poly1305
         - 'hybrid': Auto-select based on hardware (default)
         """
-        self.salt = salt
-        self.key_deriver = KeyDerivation(password, self.salt)
-        self.aes_cipher = AESGCMCipher(self.key_deriver.get_aes_key())
-        self.chacha_cipher = ChaCha20Poly1305Cipher(self.key_deriver.get_chacha_key())
+        self.aes_cipher = AESGCMCipher(aes_key)
+        self.chacha_cipher = ChaCha20Poly1305Cipher(chacha_key)
         self.algorithm = algorithm.lower()
-        self.use_aes = self.has_aes_ni() if algorithm == "hybrid" else None
+        self.use_aes = self.prefers_aes() if algorithm == "hybrid" else None
     
     @classmethod
     def from_keys(cls, aes_key: bytes, chacha_key: bytes, algorithm: str = "hybrid"):
-        obj = cls.__new__(cls)  # bypass __init__
-        obj.aes_cipher = AESGCMCipher(aes_key)
-        obj.chacha_cipher = ChaCha20Poly1305Cipher(chacha_key)
-        obj.algorithm = algorithm.lower()
-        obj.use_aes = obj.has_aes_ni() if algorithm == "hybrid" else None
-        return obj
-    
-    def has_aes_ni(self) -> bool:
-        """Detect AES-NI hardware acceleration"""
-        try:
-            import cpufeature
-            return cpufeature.CPUFeature.get('AES', False)
-        except ImportError:
-            os_name = platform.system()
-            if os_name == "Linux":
-                try:
-                    with open('/proc/cpuinfo', 'r') as f:
-                        return 'aes' in f.read().lower()
-                except: return False
-            elif os_name == "Darwin":  # macOS
-                try:
-                    result = subprocess.run(
-                        ['sysctl', '-n', 'machdep.cpu.features'],
-                        capture_output=True, text=True
-                    )
-                    return 'aes' in result.stdout.lower()
-                except: return False
-            elif os_name == "Windows":
-                try:
-                    result = subprocess.run(
-                        ['powershell', '-Command', 
-                         '(Get-WmiObject Win32_Processor).AESInstructionSet'],
-                        capture_output=True, text=True,
-                        creationflags=subprocess.CREATE_NO_WINDOW
-                    )
-                    return 'true' in result.stdout.lower()
-                except: return False
-        return False
+        return cls(aes_key, chacha_key, algorithm)
     
+    def clear_keys(self):
+        """Wipe both cipher keys; the manager is unusable afterwards"""
+        self.aes_cipher.clear()
+        self.chacha_cipher.clear()
+
+    def prefers_aes(self) -> bool:
+        """True if AES-GCM measured faster than ChaCha20-Poly1305 on this machine"""
+        return get_cipher_profile()["preferred"] == "aes"
+
+    def _write_cipher(self) -> tuple:
+        """(algorithm id, cipher) used for new ciphertexts"""
+        if self.algorithm == "aes" or (self.algorithm == "hybrid" and self.use_aes):
+            return 'AES', self.aes_cipher
+        return 'CHA', self.chacha_cipher
+
+    def _check_algorithm(self, algorithm: str):
+        """Validate algorithm selection matches data"""
+        if self.algorithm == "aes" and algorithm != 'AES':
+            raise ValueError("Data not encrypted with AES")
+        if self.algorithm == "chacha" and algorithm != 'CHA':
+            raise ValueError("Data not encrypted with ChaCha")
+        if algorithm not in NONCE_SIZES:
+            raise ValueError("Unsupported algorithm prefix")
+
     def encrypt(self, plaintext: bytes, context: bytes = b'') -> bytes:
         """Encrypt using selected algorithm with metadata prefix"""
         if self.algorithm == "aes":
@@ -136,21 +229,93 @@ class HybridEncryptionManager:
         else:
             raise ValueError("Unsupported algorithm prefix")
 
+    def encrypt_record(self, plaintext: bytes, context: bytes = b'') -> EncryptedRecord:
+        """Encrypt with the selected algorithm, keeping nonce/ciphertext/tag separate"""
+        return self.encrypt_records([(plaintext, context)])[0]
+
+    def decrypt_record(self, record: EncryptedRecord, context: bytes = b'') -> bytes:
+        """Decrypt an EncryptedRecord straight from its parts"""
+        self._check_algorithm(record.algorithm)
+        cipher = self.aes_cipher if record.algorithm == 'AES' else self.chacha_cipher
+        return cipher.decrypt_many([((record.nonce, record.ciphertext, record.tag), context)])[0]
+
+    def encrypt_records(self, items) -> list:
+        """Encrypt (plaintext, context) pairs into EncryptedRecords, in input order"""
+        algorithm, cipher = self._write_cipher()
+        return [EncryptedRecord(algorithm, *parts) for parts in cipher.encrypt_many(items)]
+
+    def encrypt_many(self, items) -> list:
+        """
+        Encrypt an iterable of (plaintext, context) pairs with the selected
+        algorithm. Results are prefixed like encrypt() and returned in order.
+        """
+        return [record.to_bytes() for record in self.encrypt_records(items)]
+
+    def decrypt_many(self, items, workers: int = 1) -> list:
+        """
+        Decrypt an iterable of (data, context) pairs, where data is an
+        EncryptedRecord or prefixed bytes. Records are grouped by algorithm so
+        each cipher handles its whole batch in one pass; plaintexts are
+        returned in input order.
+        With workers > 1 and at least PARALLEL_DECRYPT_THRESHOLD records, each
+        group is split into chunks decrypted on a thread pool (pycryptodome
+        releases the GIL inside its C primitives).
+        """
+        groups = {'AES': ([], []), 'CHA': ([], [])}
+        count = 0
+        for data, context in items:
+            record = data if isinstance(data, EncryptedRecord) else EncryptedRecord.from_bytes(data)
+            self._check_algorithm(record.algorithm)
+            positions, batch = groups[record.algorithm]
+            positions.append(count)
+            batch.append(((record.nonce, record.ciphertext, record.tag), context))
+            count += 1
+
+        ciphers = (('AES', self.aes_cipher), ('CHA', self.chacha_cipher))
+        results = [None] * count
+        if workers > 1 and count >= PARALLEL_DECRYPT_THRESHOLD:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                chunks = []
+                for algorithm, cipher in ciphers:
+                    positions, batch = groups[algorithm]
+                    size = -(-len(batch) // workers) or 1
+                    for start in range(0, len(batch), size):
+                        future = pool.submit(cipher.decrypt_many, batch[start:start + size])
+                        chunks.append((positions[start:start + size], future))
+                for positions, future in chunks:
+                    for position, plaintext in zip(positions, future.result()):
+                        results[position] = plaintext
+            return results
+
+        for algorithm, cipher in ciphers:
+            positions, batch = groups[algorithm]
+            if batch:
+                for position, plaintext in zip(positions, cipher.decrypt_many(batch)):
+                    results[position] = plaintext
+        return results
+
 class KeyDerivation:
-    def __init__(self, password: str, salt: bytes, iterations: int = 120_000):
+    def __init__(self, password: str, salt: bytes, iterations: int = 120_000, kdf_params: dict = None):
         self.password = password.encode('utf-8')
         self.salt = salt
-        self.iterations = iterations
+        self.kdf_params = dict(kdf_params or {"kdf": KDF_PBKDF2, "iterations": iterations})
+        self.iterations = self.kdf_params.get("iterations", 0)
         self.master_key = self._derive_master_key()
-    
+
     def _derive_master_key(self) -> bytes:
-        return PBKDF2(
-            self.password,
-            self.salt,
-            dkLen=32,
-            count=self.iterations,
-            hmac_hash_module=SHA256
-        )
+        return derive_master_key(self.password, self.salt, self.kdf_params)
+
+    @classmethod
+    def from_master_key(cls, master_key: bytes, salt: bytes = b''):
+        """Derive subkeys from an existing 256-bit key (e.g. a vault data key) without the password KDF"""
+        obj = cls.__new__(cls)  # bypass __init__
+        obj.password = None
+        obj.salt = salt
+        obj.kdf_params = None
+        obj.iterations = 0
+        obj.master_key = master_key
+        return obj
+
     def get_database_key(self) -> bytes:
         return HKDF(
             self.master_key,
@@ -177,11 +342,214 @@ class KeyDerivation:
             context=b'chacha20'
         )
 
+    def get_key_check(self) -> bytes:
+        """Value stored in the vault to verify a password without opening the database"""
+        return HKDF(
+            self.master_key,
+            32,
+            salt=None,
+            hashmod=SHA256,
+            context=b'key-check'
+        )
+
+    def get_index_key(self) -> bytes:
+        """HMAC key for the blind-index columns used for exact service/username lookups"""
+        return HKDF(
+            self.master_key,
+            32,
+            salt=None,
+            hashmod=SHA256,
+            context=b'blind-index'
+        )
+
+    def get_session_key(self) -> bytes:
+        """HMAC key protecting the CLI session file (see core.session)"""
+        return HKDF(
+            self.master_key,
+            32,
+            salt=None,
+            hashmod=SHA256,
+            context=b'session'
+        )
+
+    def get_wrap_key(self) -> bytes:
+        return HKDF(
+            self.master_key,
+            32,
+            salt=None,
+            hashmod=SHA256,
+            context=b'key-wrap'
+        )
+
+    def wrap_data_key(self, data_key: bytes) -> bytes:
+        """Encrypt a vault data key under the password-derived wrapping key"""
+        return AESGCMCipher(self.get_wrap_key()).encrypt(data_key, b'vault-data-key')
+
+    def unwrap_data_key(self, wrapped_key: bytes) -> bytes:
+        """Decrypt a wrapped vault data key. Raises ValueError on a wrong password"""
+        return AESGCMCipher(self.get_wrap_key()).decrypt(wrapped_key, b'vault-data-key')
+
     def get_salt(self) -> bytes:
         return self.salt
 
     def clear_sensitive_data(self):
         """Securely wipe sensitive data from memory"""
-        zeroize1(self.password)
+        if self.password:
+            zeroize1(self.password)
         zeroize1(self.master_key)
-        zeroize1(self.salt)
\ No newline at end of file
+        zeroize1(self.salt)
+
+
+def blind_index(index_key: bytes, value: str) -> bytes:
+    """
+    Keyed HMAC-SHA256 of a normalized (NFKC, trimmed, case-folded) value, so
+    equal values can be looked up through an index without storing them.
+    """
+    normalized = unicodedata.normalize("NFKC", value).strip().casefold()
+    return hmac.new(index_key, normalized.encode(), hashlib.sha256).digest()
+
+
+def argon2_available() -> bool:
+    try:
+        import argon2.low_level  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def derive_master_key(password: bytes, salt: bytes, kdf_params: dict) -> bytes:
+    """Run the password KDF described by kdf_params and return a 256-bit key"""
+    kdf = kdf_params.get("kdf", KDF_PBKDF2)
+    if kdf == KDF_PBKDF2:
+        return PBKDF2(
+            password,
+            salt,
+            dkLen=32,
+            count=kdf_params["iterations"],
+            hmac_hash_module=SHA256
+        )
+    if kdf == KDF_ARGON2ID:
+        try:
+            from argon2.low_level import hash_secret_raw, Type
+        except ImportError as e:
+            raise RuntimeError("This vault uses Argon2id; install the 'argon2-cffi' package to unlock it") from e
+        return hash_secret_raw(
+            bytes(password),
+            salt,
+            time_cost=kdf_params["time_cost"],
+            memory_cost=kdf_params["memory_cost"],
+            parallelism=kdf_params["parallelism"],
+            hash_len=32,
+            type=Type.ID
+        )
+    raise ValueError(f"Unsupported KDF: {kdf}")
+
+
+def _time_kdf(kdf_params: dict, repeat: int = 3) -> float:
+    """Best-of-N wall time (seconds) of one derivation with kdf_params"""
+    password, salt = b'calibration-password', os.urandom(16)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        derive_master_key(password, salt, kdf_params)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate_kdf(target_ms: int = DEFAULT_UNLOCK_MS, kdf: str = None) -> dict:
+    """
+    Pick KDF parameters that take about target_ms to derive a key on this
+    machine. Defaults to Argon2id when argon2-cffi is installed, else PBKDF2.
+    - PBKDF2: iterations are scaled linearly from a 20k-iteration probe.
+    - Argon2id: 64 MiB (lowered to 19 MiB on slow machines) with up to 4
+      lanes, and time_cost scaled to fill the budget.
+    The returned dict includes the measured time as 'measured_ms'.
+    """
+    kdf = kdf or (KDF_ARGON2ID if argon2_available() else KDF_PBKDF2)
+    target = target_ms / 1000
+
+    if kdf == KDF_PBKDF2:
+        probe = {"kdf": KDF_PBKDF2, "iterations": 20_000}
+        per_iteration = _time_kdf(probe) / probe["iterations"]
+        iterations = max(LEGACY_KDF_PARAMS["iterations"], int(target / per_iteration) // 1000 * 1000)
+        params = {"kdf": KDF_PBKDF2, "iterations": iterations}
+    elif kdf == KDF_ARGON2ID:
+        params = {
+            "kdf": KDF_ARGON2ID,
+            "time_cost": 1,
+            "memory_cost": 64 * 1024,
+            "parallelism": min(4, os.cpu_count() or 1)
+        }
+        elapsed = _time_kdf(params)
+        while elapsed > target and params["memory_cost"] > 19 * 1024:
+            params["memory_cost"] = max(19 * 1024, params["memory_cost"] // 2)
+            elapsed = _time_kdf(params)
+        params["time_cost"] = max(1, int(target / elapsed))
+    else:
+        raise ValueError(f"Unsupported KDF: {kdf}")
+
+    params["measured_ms"] = round(_time_kdf(params, repeat=1) * 1000)
+    return params
+
+
+def _machine_fingerprint() -> str:
+    """Identifies the host/runtime a cipher profile was measured on (no subprocesses)"""
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}|pycryptodome-{Cryptodome.__version__}"
+
+
+def benchmark_ciphers(record_sizes=PROFILE_RECORD_SIZES, rounds: int = 300) -> dict:
+    """
+    Time encrypt+decrypt of record_sizes with AES-GCM and ChaCha20-Poly1305.
+    Returns microseconds per record (averaged over sizes) and the faster one.
+    """
+    key = os.urandom(32)
+    results = {}
+    for name, cipher in (("aes", AESGCMCipher(key)), ("chacha", ChaCha20Poly1305Cipher(key))):
+        best = float("inf")
+        for _ in range(3):
+            items = [(os.urandom(size), b'benchmark') for size in record_sizes for _ in range(rounds // len(record_sizes))]
+            start = time.perf_counter()
+            cipher.decrypt_many(zip(cipher.encrypt_many(items), (ad for _, ad in items)))
+            best = min(best, (time.perf_counter() - start) / len(items))
+        results[f"{name}_us"] = round(best * 1_000_000, 3)
+    results["preferred"] = "aes" if results["aes_us"] <= results["chacha_us"] else "chacha"
+    return results
+
+
+def get_cipher_profile(path: str = None, refresh: bool = False) -> dict:
+    """
+    Load the cached cipher profile for this machine, measuring and saving it
+    on first use (or when the file belongs to a different machine/runtime).
+    The result is kept in memory for the rest of the process.
+    """
+    global _cipher_profile
+    path = path or CIPHER_PROFILE_PATH
+    fingerprint = _machine_fingerprint()
+    if _cipher_profile and not refresh and _cipher_profile.get("machine") == fingerprint:
+        return _cipher_profile
+
+    profile = None
+    if not refresh:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                profile = json.load(f)
+            if profile.get("machine") != fingerprint or profile.get("preferred") not in ("aes", "chacha"):
+                profile = None
+        except (OSError, ValueError):
+            profile = None
+
+    if profile is None:
+        profile = benchmark_ciphers()
+        profile["machine"] = fingerprint
+        profile["record_sizes"] = list(PROFILE_RECORD_SIZES)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(profile, f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # Read-only home: keep the in-memory result for this process
+
+    _cipher_profile = profile
+    return profile
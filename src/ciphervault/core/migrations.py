@@ -0,0 +1,244 @@
+import logging
+from contextlib import closing
+from typing import Callable, NamedTuple
+import sqlcipher3.dbapi2 as sqlite
+
+# Ordered migration registries. Schema migrations change the database layout
+# and run when the database is opened; data migrations rewrite entries, need
+# the vault keys and run when the vault is unlocked. Applied versions are kept
+# in vault_config as 'schema_version' and 'data_version'.
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable
+
+
+SCHEMA_MIGRATIONS = []
+DATA_MIGRATIONS = []
+
+
+def _register(registry: list, version: int, description: str):
+    def decorator(fn):
+        if registry and registry[-1].version >= version:
+            raise ValueError(f"Migration {version} registered out of order")
+        registry.append(Migration(version, description, fn))
+        return fn
+    return decorator
+
+
+def schema_migration(version: int, description: str):
+    """Register fn(cursor) as schema migration `version`; it runs inside the migration's transaction"""
+    return _register(SCHEMA_MIGRATIONS, version, description)
+
+
+def data_migration(version: int, description: str):
+    """
+    Register fn(vault, progress) as data migration `version`. It must commit
+    in batches and pick up where it stopped when run again, and returns False
+    to postpone itself (and later migrations) until a future unlock.
+    """
+    return _register(DATA_MIGRATIONS, version, description)
+
+
+def _add_column_if_missing(c, table: str, column: str, definition: str):
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in (row[1] for row in c.fetchall()):
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def get_schema_version(db) -> int:
+    with closing(db.conn.cursor()) as c:
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vault_config'")
+        if not c.fetchone():
+            return 0
+    return int(db.get_config("schema_version") or 0)
+
+
+def get_data_version(db) -> int:
+    return int(db.get_config("data_version") or 0)
+
+
+def migrate_schema(db) -> int:
+    """
+    Apply pending schema migrations in order, each in its own transaction
+    together with the version bump. Returns the resulting schema version.
+    """
+    version = get_schema_version(db)
+    for migration in SCHEMA_MIGRATIONS:
+        if migration.version <= version:
+            continue
+        with db.transaction():
+            if not db.conn.in_transaction:
+                # DDL does not open a transaction implicitly
+                db.conn.execute("BEGIN")
+            with closing(db.conn.cursor()) as c:
+                migration.apply(c)
+            db.set_config("schema_version", str(migration.version))
+        version = migration.version
+        logging.info(f"Vault schema migrated to version {version}: {migration.description}")
+    return version
+
+
+def migrate_data(vault, progress=None) -> list:
+    """
+    Apply pending data migrations in order. progress(description, done,
+    total) is called as each one advances. Returns the descriptions of the
+    migrations applied.
+    """
+    version = get_data_version(vault.db)
+    applied = []
+    for migration in DATA_MIGRATIONS:
+        if migration.version <= version:
+            continue
+        step_progress = None
+        if progress:
+            step_progress = lambda done, total, description=migration.description: progress(description, done, total)
+        if migration.apply(vault, step_progress) is False:
+            logging.info(f"Vault data migration {migration.version} postponed: {migration.description}")
+            break
+        vault.db.set_config("data_version", str(migration.version))
+        applied.append(migration.description)
+        logging.info(f"Vault data migrated to version {migration.version}: {migration.description}")
+    return applied
+
+
+@schema_migration(1, "Create entry and configuration tables")
+def _create_base_tables(c):
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS vault_entries (
+        id BLOB PRIMARY KEY,
+        nonce BLOB NOT NULL,
+        tag BLOB NOT NULL,
+        ciphertext BLOB NOT NULL,
+        algorithm TEXT NOT NULL CHECK(algorithm IN ('AES', 'CHA')),
+        algorithm_mechanism TEXT NOT NULL CHECK(algorithm_mechanism IN ('aes', 'chacha', 'hybrid')),
+        associated_data TEXT,
+        created_at TIMESTAMP DEFAULT (STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')),
+        updated_at TIMESTAMP DEFAULT (STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW'))
+    ) WITHOUT ROWID;
+    """)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS vault_config (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    ) WITHOUT ROWID;
+    """)
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS update_timestamp
+    AFTER UPDATE ON vault_entries
+    FOR EACH ROW
+    BEGIN
+        UPDATE vault_entries SET updated_at = STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')
+        WHERE id = OLD.id;
+    END;
+    """)
+
+
+@schema_migration(2, "Add separately encrypted entry metadata")
+def _add_metadata_column(c):
+    _add_column_if_missing(c, "vault_entries", "metadata", "BLOB")
+
+
+@schema_migration(3, "Add blind-index columns for exact lookups")
+def _add_blind_index_columns(c):
+    _add_column_if_missing(c, "vault_entries", "service_idx", "BLOB")
+    _add_column_if_missing(c, "vault_entries", "username_idx", "BLOB")
+    c.execute("""
+    CREATE INDEX IF NOT EXISTS idx_entries_blind
+    ON vault_entries (service_idx, username_idx)
+    """)
+
+
+@schema_migration(4, "Add a full-text search index over entry metadata")
+def _add_search_index(c):
+    _add_column_if_missing(c, "vault_entries", "search_rowid", "INTEGER")
+    # trigram matches substrings like the old in-memory filter did; builds
+    # without it fall back to word/prefix matching
+    try:
+        c.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS entry_search
+        USING fts5(entry_id UNINDEXED, service, username, notes, tags, tokenize = 'trigram')
+        """)
+    except sqlite.OperationalError:
+        c.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS entry_search
+        USING fts5(entry_id UNINDEXED, service, username, notes, tags, tokenize = 'unicode61 remove_diacritics 2')
+        """)
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS entry_search_delete
+    AFTER DELETE ON vault_entries
+    FOR EACH ROW WHEN OLD.search_rowid IS NOT NULL
+    BEGIN
+        DELETE FROM entry_search WHERE rowid = OLD.search_rowid;
+    END;
+    """)
+
+
+@schema_migration(5, "Add the entry change journal")
+def _add_change_journal(c):
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS vault_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        op TEXT NOT NULL CHECK(op IN ('insert', 'update', 'delete')),
+        entry_id BLOB NOT NULL
+    );
+    """)
+    # Index, search and timestamp bookkeeping columns are left out so that
+    # backfills and the updated_at trigger do not journal every entry
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS journal_entry_insert
+    AFTER INSERT ON vault_entries
+    BEGIN
+        INSERT INTO vault_changes (op, entry_id) VALUES ('insert', NEW.id);
+    END;
+    """)
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS journal_entry_update
+    AFTER UPDATE OF ciphertext, metadata, associated_data ON vault_entries
+    BEGIN
+        INSERT INTO vault_changes (op, entry_id) VALUES ('update', NEW.id);
+    END;
+    """)
+    c.execute("""
+    CREATE TRIGGER IF NOT EXISTS journal_entry_delete
+    AFTER DELETE ON vault_entries
+    BEGIN
+        INSERT INTO vault_changes (op, entry_id) VALUES ('delete', OLD.id);
+    END;
+    """)
+
+
+@schema_migration(6, "Limit updated_at to entry content changes")
+def _limit_update_timestamp(c):
+    # The baseline trigger fired on any column, so index, search and
+    # re-encryption bookkeeping marked every entry as just modified
+    c.execute("DROP TRIGGER IF EXISTS update_timestamp")
+    c.execute("""
+    CREATE TRIGGER update_timestamp
+    AFTER UPDATE OF ciphertext, metadata, associated_data ON vault_entries
+    FOR EACH ROW
+    BEGIN
+        UPDATE vault_entries SET updated_at = STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')
+        WHERE id = OLD.id;
+    END;
+    """)
+
+
+@data_migration(1, "Encrypt entry metadata separately")
+def _backfill_metadata(vault, progress):
+    vault._backfill_metadata(progress=progress)
+
+
+@data_migration(2, "Compute blind indexes")
+def _backfill_blind_indexes(vault, progress):
+    # Needs the index key, which keyring sessions from older versions lack
+    if vault.index_key is None:
+        return False
+    vault._backfill_blind_indexes(progress=progress)
+
+
+@data_migration(3, "Build the full-text search index")
+def _backfill_search_index(vault, progress):
+    vault._backfill_search_index(progress=progress)
@@ -0,0 +1,104 @@
+import struct
+
+# Field order of a password entry plaintext
+ENTRY_FIELDS = ("service", "username", "password", "notes")
+
+# Field order of the separately encrypted metadata used for listing;
+# tags are stored comma-separated
+META_FIELDS = ("service", "username", "notes", "tags")
+
+# Leading byte of a length-prefixed record. Legacy records are pipe-joined
+# text and start with the first character of the service name, never 0x01.
+RECORD_FORMAT_V1 = 0x01
+
+_LENGTH = struct.Struct(">I")
+
+
+def encode_record(values: dict, fields: tuple = ENTRY_FIELDS) -> bytearray:
+    """
+    Serialize values (str or bytes-like, keyed by field name) as
+    format byte + (4-byte big-endian length + bytes) per field.
+    Returns a bytearray so the caller can zeroize it after encryption.
+    """
+    record = bytearray((RECORD_FORMAT_V1,))
+    for name in fields:
+        value = values.get(name) or b''
+        if isinstance(value, str):
+            value = value.encode()
+        record += _LENGTH.pack(len(value))
+        record += value
+    return record
+
+
+def _legacy_spans(data, count: int) -> list:
+    """(start, end) of each field of a pipe-joined record, split like str.split('|', count - 1)"""
+    # '|' is ASCII, so it never occurs inside a multi-byte UTF-8 sequence and
+    # the byte-level split matches the old text-level one.
+    spans = []
+    start = 0
+    while len(spans) < count - 1:
+        end = data.find(b'|', start)
+        if end < 0:
+            break
+        spans.append((start, end))
+        start = end + 1
+    spans.append((start, len(data)))
+    return spans
+
+
+def _spans(data, count: int) -> list:
+    """(start, end) of each field of a record; data is bytes or bytearray"""
+    if not data or data[0] != RECORD_FORMAT_V1:
+        return _legacy_spans(data, count)
+    spans = []
+    offset = 1
+    for _ in range(count):
+        if offset + _LENGTH.size > len(data):
+            raise ValueError("Truncated record")
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        if offset + length > len(data):
+            raise ValueError("Truncated record")
+        spans.append((offset, offset + length))
+        offset += length
+    return spans
+
+
+def read_field(data, name: str, fields: tuple = ENTRY_FIELDS) -> memoryview:
+    """
+    Return one field of a record as a memoryview into data, without decoding
+    or copying any other field. Missing legacy fields read as empty.
+    """
+    view = memoryview(data)
+    index = fields.index(name)
+    spans = _spans(data, len(fields))
+    if index >= len(spans):
+        return view[0:0]
+    start, end = spans[index]
+    return view[start:end]
+
+
+def decode_field(data, name: str, fields: tuple = ENTRY_FIELDS) -> str:
+    """Decode a single field of a record to str"""
+    return str(read_field(data, name, fields), 'utf-8')
+
+
+def decode_record(data, names: tuple = None, fields: tuple = ENTRY_FIELDS) -> dict:
+    """Decode the requested fields (all by default) of a record to str"""
+    view = memoryview(data)
+    spans = _spans(data, len(fields))
+    result = {}
+    for index, name in enumerate(fields):
+        if names is not None and name not in names:
+            continue
+        if index < len(spans):
+            start, end = spans[index]
+            result[name] = str(view[start:end], 'utf-8')
+        else:
+            result[name] = ""
+    return result
+
+
+def split_tags(value: str) -> list:
+    """Tags list from the comma-separated metadata field"""
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
@@ -0,0 +1,151 @@
+import os
+import hmac
+import json
+import stat
+import time
+import base64
+import hashlib
+import tempfile
+
+# CLI session state (last use and idle timeout) lives in a small file in the
+# per-user runtime directory instead of the vault, so checking and refreshing
+# a session needs no SQLCipher key setup and no database write. The file is
+# replaced atomically and carries an HMAC under the session key (see
+# KeyDerivation.get_session_key), so it cannot be edited to extend a session.
+SESSION_TAG_SIZE = 32
+# Idle timeout in seconds for vaults without a 'session_timeout' config
+DEFAULT_SESSION_TIMEOUT = 60
+
+
+# Alternative names tried when the session directory in the temp dir is
+# taken by something we cannot trust (another user's directory, a symlink)
+SESSION_DIR_ATTEMPTS = 100
+
+
+def _is_private_dir(path: str) -> bool:
+    """True if path is a real directory (not a symlink) owned by us with mode 0700"""
+    if not hasattr(os, "getuid"):
+        return os.path.isdir(path)
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and stat.S_IMODE(st.st_mode) == 0o700
+
+
+def _private_dir(path: str) -> bool:
+    """Create path with mode 0700 unless it exists; True if it is then safe to use"""
+    try:
+        os.mkdir(path, 0o700)
+        # mkdir's mode is masked by the umask
+        os.chmod(path, 0o700)
+    except FileExistsError:
+        pass
+    return _is_private_dir(path)
+
+
+def session_dir() -> str:
+    """
+    Per-user directory for session files and agent sockets, mode 0700.
+    A directory we do not own (e.g. pre-created by another user in a shared
+    temp dir) is never used: like mkdtemp, the next candidate name is tried,
+    but the names are fixed so every invocation finds the same directory.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        path = os.path.join(runtime_dir, "ciphervault")
+        if _private_dir(path):
+            return path
+    uid = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    base = os.path.join(tempfile.gettempdir(), f"ciphervault-{uid}")
+    for attempt in range(SESSION_DIR_ATTEMPTS):
+        path = base if not attempt else f"{base}-{attempt}"
+        if _private_dir(path):
+            return path
+    raise RuntimeError(f"No private session directory available under {tempfile.gettempdir()}")
+
+
+def runtime_path(vault_path: str, suffix: str) -> str:
+    """Path in session_dir() for a per-vault runtime file (session, agent socket)"""
+    name = hashlib.sha256(os.path.abspath(vault_path).encode('utf-8')).hexdigest()[:32]
+    return os.path.join(session_dir(), f"{name}.{suffix}")
+
+
+def get_session_key() -> bytes:
+    """The session key stored at login, or None (logged out, or a session from an older version)"""
+    # keyring is imported here so commands that only check the session stay cheap to start
+    import keyring
+    session_key = keyring.get_password("session_key", "session_key")
+    return base64.b64decode(session_key) if session_key else None
+
+
+def clear_session_keys():
+    """Remove the keys a login stored in the keyring, ending the CLI session"""
+    import keyring
+    from keyring.errors import PasswordDeleteError
+    for service, username in (("database_key", "db_key"), ("aes_key", "aes_key"), ("chacha_key", "chacha_key"),
+                              ("index_key", "index_key"), ("session_key", "session_key")):
+        try:
+            keyring.delete_password(service, username)
+        except PasswordDeleteError:
+            pass
+
+
+class SessionStore:
+    def __init__(self, vault_path: str, session_key: bytes = None):
+        self.vault_path = os.path.abspath(vault_path)
+        self.session_key = session_key
+        self.path = runtime_path(self.vault_path, "session")
+
+    def _tag(self, payload: bytes) -> bytes:
+        return hmac.new(self.session_key, payload, hashlib.sha256).digest()
+
+    def load(self) -> dict:
+        """The stored session, or None if there is none or it fails verification"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        tag, payload = data[:SESSION_TAG_SIZE], data[SESSION_TAG_SIZE:]
+        if not self.session_key or not hmac.compare_digest(tag, self._tag(payload)):
+            return None
+        state = json.loads(payload.decode('utf-8'))
+        # A session file copied from another vault's path does not apply here
+        if state.get("vault") != self.vault_path:
+            return None
+        return state
+
+    def save(self, state: dict):
+        state = dict(state, vault=self.vault_path)
+        payload = json.dumps(state, sort_keys=True).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._tag(payload) + payload)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def start(self, timeout_seconds: int):
+        """Begin a session that expires after timeout_seconds without use"""
+        self.save({"last_used": time.time(), "timeout": timeout_seconds})
+
+    def touch(self, state: dict = None):
+        """Record a use of the session"""
+        state = state or self.load()
+        if state is not None:
+            self.save(dict(state, last_used=time.time()))
+
+    def idle_seconds(self, state: dict) -> float:
+        return time.time() - state["last_used"]
+
+    def is_expired(self, state: dict) -> bool:
+        return self.idle_seconds(state) > state["timeout"]
+
+    def clear(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,19 +1,17 @@
-import secrets
 import string
 import time
 import threading
-import pyperclip
-import requests
 import hashlib
 import warnings
-import zxcvbn
-from pyhibp import pwnedpasswords, set_user_agent
 from datetime import datetime
-import socket
 import os, sys
 import json
 import shutil
 
+# secrets, socket and the clipboard, HTTP and strength-estimation packages
+# are imported inside the functions that use them: every CLI command imports
+# this module, and most never need them.
+
 def resource_path(relative_path):
     """Get absolute path to resource, works both during development and in PyInstaller bundle."""
     base_path = getattr(sys, '_MEIPASS', os.path.abspath("."))
@@ -37,6 +35,7 @@ def generate_password(
     if not alphabet:
         raise ValueError("Character set is empty. Enable at least one option.")
 
+    import secrets
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
 def generate_strong_password(
@@ -47,6 +46,7 @@ def generate_strong_password(
     min_score=4,
     max_attempts=10
 ) -> str:
+    import zxcvbn
     for _ in range(max_attempts):
         pwd = generate_password(length, use_uppercase, use_digits, use_symbols)
         score = zxcvbn.zxcvbn(pwd).get("score", 0)
@@ -60,6 +60,7 @@ def copy_clipboard(password: str, timeout_seconds: int = 30):
     """
     Copy password to clipboard and auto-clear after timeout_seconds.
     """
+    import pyperclip
     pyperclip.copy(password)
     
     def clear_clipboard():
@@ -73,6 +74,7 @@ def copy_clipboard(password: str, timeout_seconds: int = 30):
 
 def is_password_pwned(password: str) -> int:
     """Check if password has been found in data breaches using HaveIBeenPwned API."""
+    import requests
     sha1_password = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
     prefix, suffix = sha1_password[:5], sha1_password[5:]
 
@@ -94,6 +96,7 @@ def is_password_breached(password: str) -> bool:
     Uses the HaveIBeenPwned password API via k-anonymity.
     This feature requires an internet connection.
     """
+    from pyhibp import pwnedpasswords, set_user_agent
     try:
         # Set a custom user agent (required by HIBP)
         set_user_agent(ua="CipherVaultApp")
@@ -111,6 +114,7 @@ def get_last_checked_timestamp() -> str:
 
 
 def is_connected_to_internet(host="8.8.8.8", port=53, timeout=3) -> bool:
+    import socket
     try:
         socket.setdefaulttimeout(timeout)
         socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
@@ -3,57 +3,131 @@ import logging
 from zeroize import zeroize1
 import keyring
 import base64
-from ciphervault.core.encryption import KeyDerivation, HybridEncryptionManager
+import json
+import hmac
+import itertools
+from contextlib import nullcontext
+from ciphervault.core.encryption import (
+    KeyDerivation, HybridEncryptionManager, LEGACY_KDF_PARAMS, PARALLEL_DECRYPT_THRESHOLD,
+    calibrate_kdf, blind_index
+)
 from ciphervault.core.database import SecurePasswordDatabase
+from sqlcipher3.dbapi2 import DatabaseError
+from ciphervault.core.migrations import migrate_data, get_data_version
+from ciphervault.core.session import SessionStore, clear_session_keys, get_session_key
+from ciphervault.core.records import ENTRY_FIELDS, META_FIELDS, encode_record, read_field, decode_field, decode_record, split_tags
+
+# Entries re-encrypted per transaction during algorithm/key migrations
+MIGRATION_BATCH_SIZE = 500
+# Entries encrypted and inserted per executemany by add_password_entries
+IMPORT_BATCH_SIZE = 1000
+# Free pages returned to the filesystem per maintenance slice (4 KiB pages)
+MAINTENANCE_SLICE_PAGES = 256
+# Large enough for a page to take the parallel decrypt path
+ENTRY_PAGE_SIZE = PARALLEL_DECRYPT_THRESHOLD
+
+# Salt files starting with this magic carry the KDF parameters after the salt;
+# a bare 16-byte salt file is a legacy PBKDF2 vault.
+VAULT_HEADER_MAGIC = b'CVH1'
+# Header for a master password change, kept next to the current one until the
+# database has been rekeyed (see PasswordVault.change_master_password)
+PENDING_HEADER_SUFFIX = ".new"
+
+
+def read_vault_header(salt_path: str) -> tuple:
+    """Return (salt, kdf_params) from a vault's salt/header file"""
+    with open(salt_path, "rb") as f:
+        data = f.read()
+    if not data.startswith(VAULT_HEADER_MAGIC):
+        return data, dict(LEGACY_KDF_PARAMS)
+    salt = data[len(VAULT_HEADER_MAGIC):len(VAULT_HEADER_MAGIC) + 16]
+    kdf_params = json.loads(data[len(VAULT_HEADER_MAGIC) + 16:].decode('utf-8'))
+    return salt, kdf_params
+
+
+def write_vault_header(salt_path: str, salt: bytes, kdf_params: dict):
+    """Atomically write the salt and KDF parameters to a vault's salt/header file"""
+    tmp_path = salt_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(VAULT_HEADER_MAGIC + salt + json.dumps(kdf_params, sort_keys=True).encode('utf-8'))
+    os.replace(tmp_path, salt_path)
+
 
 class PasswordVault:
-    def __init__(self, master_password: str = None, db_path: str = None, algorithm_mech: str = None):
+    def __init__(self, master_password: str = None, db_path: str = None, algorithm_mech: str = None,
+                 kdf_params: dict = None, progress=None):
+        """
+        kdf_params only applies when creating a vault; if omitted, the KDF is
+        calibrated on this machine to the default unlock-time budget.
+        progress(description, done, total) reports pending data migrations
+        run during unlock (see core.migrations).
+        """
         self.db_path = db_path
         self.salt_path = db_path + ".salt"
         self.master_password_ba = bytearray(master_password, 'utf-8') if master_password else None
-        self._initialize_vault(algorithm_mech)
+        self._initialize_vault(algorithm_mech, kdf_params, progress)
     
-    def get_or_create_salt(self, salt_path: str) -> bytes:
+    def get_or_create_salt(self, salt_path: str, kdf_params: dict = None) -> bytes:
         if os.path.exists(salt_path):
-            with open(salt_path, "rb") as f:
-                return f.read()
+            salt, self.kdf_params = read_vault_header(salt_path)
+            return salt
         salt = os.urandom(16)
-        with open(salt_path, "wb") as f:
-            f.write(salt)
+        self.kdf_params = kdf_params or calibrate_kdf()
+        write_vault_header(salt_path, salt, self.kdf_params)
         return salt
     
-    def _initialize_vault(self, algorithm_mech: str = None):
-        self.salt = self.get_or_create_salt(self.salt_path)
+    def _initialize_vault(self, algorithm_mech: str = None, kdf_params: dict = None, progress=None):
+        self.salt = self.get_or_create_salt(self.salt_path, kdf_params)
         if self.master_password_ba:
             password_str = self.master_password_ba.decode('utf-8')
-            self.key_deriver = KeyDerivation(password_str, self.salt)
+            self.key_deriver = KeyDerivation(password_str, self.salt, kdf_params=self.kdf_params)
             self.db_key = self.key_deriver.get_database_key()
+            self._open_with_password(password_str)
+            self.session_key = self.key_deriver.get_session_key()
+            keyring.set_password("session_key", "session_key", base64.b64encode(self.session_key).decode())
         else:
             self.db_key = base64.b64decode(keyring.get_password("database_key", "db_key"))
+            self.session_key = get_session_key()
             password_str=None
-        self.db = SecurePasswordDatabase(self.db_path, self.db_key)
+            self.db = SecurePasswordDatabase(self.db_path, self.db_key)
         # Check if vault exists and get algorithm
         self.algorithm_mech = self._get_persisted_algorithm() or algorithm_mech or "hybrid"
         
         # Initialize encryption manager
         if password_str:
-            self.encryption_manager = HybridEncryptionManager(password_str, self.salt, self.algorithm_mech)
             del password_str
-            aes_key = self.key_deriver.get_aes_key()
-            chacha_key = self.key_deriver.get_chacha_key()
-            keyring.set_password("aes_key", "aes_key", base64.b64encode(aes_key).decode())
-            keyring.set_password("chacha_key", "chacha_key", base64.b64encode(aes_key).decode())
+            if not self._vault_exists():
+                self._create_data_key()
+            entry_key_deriver = self._get_entry_key_deriver(self.key_deriver)
+            aes_key = entry_key_deriver.get_aes_key()
+            chacha_key = entry_key_deriver.get_chacha_key()
+            self.index_key = entry_key_deriver.get_index_key()
+            self._store_entry_keys(aes_key, chacha_key, self.index_key)
+            if not self.db.get_config("key_check"):
+                self.db.set_config("key_check", self.key_deriver.get_key_check().hex())
         else:
+            self.key_deriver = None
             aes_key = base64.b64decode(keyring.get_password("aes_key", "aes_key"))
             chacha_key = base64.b64decode(keyring.get_password("chacha_key", "chacha_key"))
-            self.encryption_manager = HybridEncryptionManager.from_keys(aes_key=aes_key, chacha_key=chacha_key, algorithm=self.algorithm_mech)
+            # Sessions stored before blind indexes existed have no index key
+            index_key = keyring.get_password("index_key", "index_key")
+            self.index_key = base64.b64decode(index_key) if index_key else None
+        self.encryption_manager = HybridEncryptionManager.from_keys(aes_key=aes_key, chacha_key=chacha_key, algorithm=self.algorithm_mech)
+        pending_algorithm = self.db.get_config("algo_migration_target")
+        if pending_algorithm:
+            self.locked = False
+            self.change_algorithm(pending_algorithm)
+        migrate_data(self, progress)
+        # Entries added by sessions without an index key are still unindexed
+        if get_data_version(self.db) >= 2:
+            self._backfill_blind_indexes()
         # If new vault, persist algorithm
         if not self._vault_exists():
             if algorithm_mech == "aes":
                 self.algorithm = "AES"
             elif algorithm_mech == "chacha":
                 self.algorithm = "CHA"
-            elif self.encryption_manager.has_aes_ni():
+            elif self.encryption_manager.prefers_aes():
                 self.algorithm = "AES"
             else:
                 self.algorithm = "CHA"
@@ -63,6 +137,53 @@ class PasswordVault:
         self.locked = False
         logging.info("Vault initialized successfully")
         
+    def _open_with_password(self, password_str: str):
+        """
+        Open the database with the password-derived key, completing a master
+        password change that was interrupted after the rekey, or dropping one
+        that was interrupted before it.
+        """
+        pending_path = self.salt_path + PENDING_HEADER_SUFFIX
+        try:
+            self.db = SecurePasswordDatabase(self.db_path, self.db_key)
+        except DatabaseError:
+            if not os.path.exists(pending_path):
+                raise
+            salt, kdf_params = read_vault_header(pending_path)
+            key_deriver = KeyDerivation(password_str, salt, kdf_params=kdf_params)
+            db_key = key_deriver.get_database_key()
+            try:
+                self.db = SecurePasswordDatabase(self.db_path, db_key)
+            except DatabaseError:
+                pass
+            else:
+                self.salt, self.kdf_params, self.key_deriver, self.db_key = salt, kdf_params, key_deriver, db_key
+                self._finish_key_change(pending_path)
+                logging.warning("Completed an interrupted master password change")
+                return
+            raise
+        if os.path.exists(pending_path) or self.db.get_config("pending_wrapped_data_key"):
+            self._discard_key_change(pending_path)
+            logging.warning("Discarded an interrupted master password change")
+
+    def _finish_key_change(self, pending_path: str):
+        """Make the staged wrapped key and header current once the database is rekeyed"""
+        pending_wrapped_key = self.db.get_config("pending_wrapped_data_key")
+        if pending_wrapped_key:
+            with self.db.transaction():
+                self.db.set_configs({"wrapped_data_key": pending_wrapped_key,
+                                     "key_check": self.db.get_config("pending_key_check")})
+                self.db.delete_config("pending_wrapped_data_key")
+                self.db.delete_config("pending_key_check")
+        os.replace(pending_path, self.salt_path)
+
+    def _discard_key_change(self, pending_path: str):
+        with self.db.transaction():
+            self.db.delete_config("pending_wrapped_data_key")
+            self.db.delete_config("pending_key_check")
+        if os.path.exists(pending_path):
+            os.remove(pending_path)
+
     def _vault_exists(self) -> bool:
         """Check if vault has existing entries or config"""
         try:
@@ -70,6 +191,37 @@ class PasswordVault:
         except:
             return False
     
+    def is_envelope_mode(self) -> bool:
+        """True if entries are encrypted under a wrapped vault data key"""
+        return self.db.get_config("key_mode") == "envelope"
+
+    def _create_data_key(self, key_deriver: KeyDerivation = None) -> bytes:
+        """Generate a random vault data key and persist it wrapped by the password-derived key"""
+        data_key = os.urandom(32)
+        wrapped_key = (key_deriver or self.key_deriver).wrap_data_key(data_key)
+        with self.db.transaction():
+            self.db.set_config("wrapped_data_key", base64.b64encode(wrapped_key).decode())
+            self.db.set_config("key_mode", "envelope")
+        return data_key
+
+    def _unwrap_data_key(self, key_deriver: KeyDerivation) -> bytes:
+        wrapped_key = base64.b64decode(self.db.get_config("wrapped_data_key"))
+        return key_deriver.unwrap_data_key(wrapped_key)
+
+    def _get_entry_key_deriver(self, key_deriver: KeyDerivation) -> KeyDerivation:
+        """
+        Entry keys come from the vault data key in envelope mode, or straight
+        from the password-derived master key for legacy vaults.
+        """
+        if self.is_envelope_mode():
+            return KeyDerivation.from_master_key(self._unwrap_data_key(key_deriver))
+        return key_deriver
+
+    def _store_entry_keys(self, aes_key: bytes, chacha_key: bytes, index_key: bytes):
+        keyring.set_password("aes_key", "aes_key", base64.b64encode(aes_key).decode())
+        keyring.set_password("chacha_key", "chacha_key", base64.b64encode(chacha_key).decode())
+        keyring.set_password("index_key", "index_key", base64.b64encode(index_key).decode())
+
     def _get_persisted_algorithm(self) -> str:
         """Get algorithm from persisted configuration"""
         return self.db.get_config("algorithm_mechanism")
@@ -77,96 +229,234 @@ class PasswordVault:
     def update_config(self, key: str, value: str):
         self.db.set_config(key, value)
 
+    def update_configs(self, values: dict):
+        """Store several config values in one commit"""
+        self.db.set_configs(values)
+
     def get_config(self, key: str, default=None):
         return self.db.get_config(key) or default
 
+    def get_db_profile(self) -> str:
+        return self.db.profile
+
+    def set_db_profile(self, profile: str):
+        """Switch the database PRAGMA profile (see PRAGMA_PROFILES) and keep it for future opens"""
+        self.db.set_profile(profile)
+        logging.info(f"Database profile set to {profile}")
+
+    def get_decrypt_workers(self) -> int:
+        """
+        Worker threads used for whole-vault decryption. Read from the
+        'decrypt_workers' config; 0 or unset means one per CPU core.
+        """
+        configured = self.db.get_config("decrypt_workers")
+        workers = int(configured) if configured else 0
+        return workers if workers > 0 else (os.cpu_count() or 1)
+
     def verify_master_password(self, password_to_test: str) -> bool:
         """
         Verify if the provided password matches the vault's master password.
+        The candidate is checked against the stored key-check value (or, for
+        vaults without one, the key of the already open connection), so no
+        second database connection is opened. A successful check caches the
+        derived keys for the rest of the session.
         """
         try:
-            # Use the existing salt
-            with open(self.salt_path, "rb") as f:
-                salt = f.read()
-            # Derive a db key from the provided password
-            key_deriver = KeyDerivation(password_to_test, salt)
-            test_db_key = key_deriver.get_database_key()
-            test_db = SecurePasswordDatabase(self.db_path, test_db_key)
-            _ = test_db.get_config("algorithm")
-            test_db.close()
-            # If no exception, password is valid
-            return True
+            salt, kdf_params = read_vault_header(self.salt_path)
+            key_deriver = KeyDerivation(password_to_test, salt, kdf_params=kdf_params)
+            stored_check = self.db.get_config("key_check")
+            if stored_check:
+                valid = hmac.compare_digest(bytes.fromhex(stored_check), key_deriver.get_key_check())
+            else:
+                valid = hmac.compare_digest(key_deriver.get_database_key(), self.db_key)
+                if valid:
+                    self.db.set_config("key_check", key_deriver.get_key_check().hex())
+            if valid and self.key_deriver is None:
+                self.key_deriver = key_deriver
+            return valid
         except Exception:
             return False
 
-    
-    def add_password_entry(self, service: str, username: str, password: str, notes: str = "") -> str:
-        if self.locked:
-            raise RuntimeError("Vault is locked")
-        
-        plaintext = f"{service}|{username}|{password}|{notes}".encode()
-        plaintext_ba = bytearray(plaintext)
-        
-        try:
-            encrypted_data = self.encryption_manager.encrypt(plaintext_ba, service.encode())
-            _ = self.db.add_entry(
-                encrypted_data, 
-                context=service,
-                algorithm_mechanism=self.algorithm_mech
+    @staticmethod
+    def _meta_context(service: str) -> bytes:
+        """Associated data of an entry's metadata record"""
+        return b'meta|' + service.encode()
+
+    @staticmethod
+    def _metadata_from_record(plaintext) -> bytearray:
+        """Metadata record built from a full entry record, without touching the password"""
+        return encode_record({
+            name: read_field(plaintext, name) for name in ('service', 'username', 'notes')
+        }, META_FIELDS)
+
+    def _blind_indexes(self, service: str, username: str, index_key: bytes = None) -> tuple:
+        """(service_idx, username_idx) for an entry, or (None, None) without an index key"""
+        index_key = index_key or self.index_key
+        if index_key is None:
+            return None, None
+        return blind_index(index_key, service), blind_index(index_key, username)
+
+    @staticmethod
+    def _search_values(values: dict, tags=None) -> tuple:
+        """An entry's row for the full-text index (see SEARCH_COLUMNS)"""
+        return values['service'], values['username'], values.get('notes') or "", ", ".join(tags or ())
+
+    def _encrypt_entry(self, values: dict, tags=None) -> tuple:
+        """
+        Encrypt an entry as (record, metadata): the full record holding the
+        password, and the metadata record used for listing.
+        """
+        return self._encrypt_entries([(values, tags)])[0]
+
+    def _encrypt_entries(self, entries: list) -> list:
+        """Encrypt (values, tags) pairs into (record, metadata) pairs in one cipher pass"""
+        plaintexts = []
+        items = []
+        for values, tags in entries:
+            plaintext_ba = encode_record(values)
+            meta_ba = encode_record({**values, 'tags': ','.join(tags or ())}, META_FIELDS)
+            plaintexts += (plaintext_ba, meta_ba)
+            items += (
+                (plaintext_ba, values['service'].encode()),
+                (meta_ba, self._meta_context(values['service'])),
             )
-            logging.info(f"Added entry for {service} and {username}")
-            return
+        try:
+            records = self.encryption_manager.encrypt_records(items)
+            return list(zip(records[0::2], records[1::2]))
         finally:
-            zeroize1(plaintext_ba)
-            del plaintext_ba
+            for plaintext_ba in plaintexts:
+                zeroize1(plaintext_ba)
+            del plaintexts, items
 
-    def get_entries_by_service(self, service: str) -> list:
-        if self.locked:
-            raise RuntimeError("Vault is locked")
-        db_entries = self.db.get_entries_by_service(service)
+    def _entry_summaries(self, db_entries: list) -> list:
+        """
+        Listing dicts for db_entries, decrypted from their metadata only.
+        Entries written before metadata was stored fall back to the full record.
+        """
+        decrypted_entries = self.encryption_manager.decrypt_many(
+            ((db_entry['metadata'], self._meta_context(db_entry['service']))
+             if db_entry['metadata'] is not None
+             else (db_entry['record'], db_entry['service'].encode())
+             for db_entry in db_entries),
+            workers=self.get_decrypt_workers()
+        )
         user_entries = []
-        for db_entry in db_entries:
-            decrypted = self.encryption_manager.decrypt(
-                db_entry['encrypted_data'],
-                service.encode()
-            )
+        for db_entry, decrypted in zip(db_entries, decrypted_entries):
             decrypted_ba = bytearray(decrypted)
             try:
-                parts = decrypted_ba.decode().split('|', 3)
+                if db_entry['metadata'] is not None:
+                    fields = decode_record(decrypted_ba, ('username', 'notes', 'tags'), META_FIELDS)
+                else:
+                    fields = decode_record(decrypted_ba, ('username', 'notes'))
                 user_entries.append({
                     'id': db_entry['id'],
-                    'service': service,
-                    'username': parts[1],
-                    'notes': parts[3] if len(parts) > 3 else ""
+                    'service': db_entry['service'],
+                    'username': fields['username'],
+                    'notes': fields['notes'],
+                    'tags': split_tags(fields.get('tags', '')),
+                    'created_at': db_entry['created_at'],
+                    'updated_at': db_entry['updated_at']
                 })
             finally:
                 zeroize1(decrypted_ba)
                 del decrypted_ba
         return user_entries
 
+    def add_password_entry(self, service: str, username: str, password: str, notes: str = "",
+                           tags: list = None) -> str:
+        if self.locked:
+            raise RuntimeError("Vault is locked")
+        record, metadata = self._encrypt_entry({
+            'service': service, 'username': username, 'password': password, 'notes': notes
+        }, tags)
+        service_idx, username_idx = self._blind_indexes(service, username)
+        entry_id = self.db.add_entry(
+            record,
+            context=service,
+            algorithm_mechanism=self.algorithm_mech,
+            metadata=metadata,
+            service_idx=service_idx,
+            username_idx=username_idx,
+            search=self._search_values({'service': service, 'username': username, 'notes': notes}, tags)
+        )
+        logging.info(f"Added entry for {service} and {username}")
+        return entry_id
+
+    def add_password_entries(self, entries, batch_size: int = IMPORT_BATCH_SIZE,
+                             atomic: bool = True) -> list:
+        """
+        Add many entries, given as dicts with service, username, password and
+        optional notes/tags. Each batch is encrypted in one pass and inserted
+        with one executemany. With atomic the whole import is one transaction;
+        otherwise every batch commits on its own, bounding what a failure loses.
+        Returns the new entry ids in input order.
+        """
+        if self.locked:
+            raise RuntimeError("Vault is locked")
+        entries = iter(entries)
+        ids = []
+        with self.db.transaction() if atomic else nullcontext():
+            while True:
+                batch = list(itertools.islice(entries, batch_size))
+                if not batch:
+                    break
+                values = []
+                for entry in batch:
+                    if not entry.get('service') or not entry.get('username'):
+                        raise ValueError("Each entry needs a service and a username")
+                    values.append({name: entry.get(name) or "" for name in ENTRY_FIELDS})
+                encrypted = self._encrypt_entries(
+                    [(entry_values, entry.get('tags')) for entry_values, entry in zip(values, batch)]
+                )
+                with self.db.transaction():
+                    ids += self.db.add_entries(
+                        (record, entry_values['service'], self.algorithm_mech, metadata,
+                         *self._blind_indexes(entry_values['service'], entry_values['username']),
+                         self._search_values(entry_values, entry.get('tags')))
+                        for entry_values, entry, (record, metadata) in zip(values, batch, encrypted)
+                    )
+                del values, batch
+        logging.info(f"Added {len(ids)} entries")
+        return ids
+
+    def get_entries_by_service(self, service: str) -> list:
+        if self.locked:
+            raise RuntimeError("Vault is locked")
+        service_idx, _ = self._blind_indexes(service, "")
+        return self._entry_summaries(self.db.get_entries_by_service(service, service_idx))
+
     def get_entry_details(self, entry_id: str) -> dict:
         if self.locked:
             raise RuntimeError("Vault is locked")
         db_entry = self.db.get_entry(entry_id)
         if not db_entry:
             return None
-        decrypted = self.encryption_manager.decrypt(
-            db_entry['encrypted_data'],
+        decrypted = self.encryption_manager.decrypt_record(
+            db_entry['record'],
             db_entry['context'].encode()
         )
         decrypted_ba = bytearray(decrypted)
         try:
-            parts = decrypted_ba.decode().split('|', 3)
-            return {
-                'id': entry_id,
-                'service': parts[0],
-                'username': parts[1],
-                'password': parts[2],
-                'notes': parts[3] if len(parts) > 3 else ""
-            }
+            entry = {'id': entry_id, **decode_record(decrypted_ba)}
         finally:
             zeroize1(decrypted_ba)
             del decrypted_ba
+        tags = ''
+        if db_entry['metadata'] is not None:
+            meta_ba = bytearray(self.encryption_manager.decrypt_record(
+                db_entry['metadata'], self._meta_context(db_entry['context'])
+            ))
+            try:
+                tags = decode_field(meta_ba, 'tags', META_FIELDS)
+            finally:
+                zeroize1(meta_ba)
+                del meta_ba
+        entry.update({
+            'tags': split_tags(tags),
+            'created_at': db_entry['created_at'],
+            'updated_at': db_entry['updated_at']
+        })
+        return entry
 
     def find_entry(self, service: str, username: str) -> dict:
         """
@@ -175,40 +465,233 @@ class PasswordVault:
         """
         if self.locked:
             raise RuntimeError("Vault is locked")
-        # Get all entries for the service
-        entries = self.get_entries_by_service(service)
-        # Search for the username within those entries
+        if self.index_key is not None:
+            # One indexed read; normally a single candidate to decrypt
+            entries = self._entry_summaries(self.db.find_entries(*self._blind_indexes(service, username)))
+        else:
+            entries = self.get_entries_by_service(service)
+        # The blind indexes are case-folded and only narrow the candidates;
+        # matches are exact, as in get_entries_by_service()
         for entry in entries:
-            if entry['username'] == username:
+            if entry['service'] == service and entry['username'] == username:
                 return entry
         return None
     
     def list_entries(self) -> list:
         if self.locked:
             raise RuntimeError("Vault is locked")
-        db_entries = self.db.get_all_entries()
-        user_entries = []
-        for db_entry in db_entries:
-            decrypted = self.encryption_manager.decrypt(
-                db_entry['encrypted_data'],
-                db_entry['service'].encode()
+        return list(self.iter_entries())
+
+    def iter_entry_pages(self, page_size: int = ENTRY_PAGE_SIZE):
+        """
+        Yield listing dicts a page at a time, reading and decrypting one
+        keyset page per step, so memory is bounded by page_size rather than
+        the vault size.
+        """
+        if self.locked:
+            raise RuntimeError("Vault is locked")
+        for page in self.db.iter_entry_pages(page_size):
+            yield self._entry_summaries(page)
+
+    def iter_entries(self, page_size: int = ENTRY_PAGE_SIZE):
+        """Yield listing dicts one by one (see iter_entry_pages)"""
+        for page in self.iter_entry_pages(page_size):
+            yield from page
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """
+        Listing dicts for entries whose service, username, notes or tags
+        contain every term of query, best matches first. Uses the full-text
+        index, so only the matches are decrypted.
+        """
+        if self.locked:
+            raise RuntimeError("Vault is locked")
+        return self._entry_summaries(self.db.search_entries(query, limit))
+
+    def change_seq(self) -> int:
+        """Position in the change journal to pass to poll_changes() after a full load"""
+        return self.db.change_seq()
+
+    def poll_changes(self, since_seq: int):
+        """
+        Entry changes since since_seq as (seq, changed, deleted_ids):
+        listing dicts of added or updated entries, and the ids of deleted
+        ones. Skips the journal query when nothing was committed since the
+        last poll. Returns None if the journal no longer reaches back to
+        since_seq, in which case the caller reloads everything.
+        """
+        if self.locked:
+            raise RuntimeError("Vault is locked")
+        if not self.db.has_new_changes():
+            return since_seq, [], []
+        try:
+            changes = self.db.changes_since(since_seq)
+            if changes is None:
+                return None
+            if not changes:
+                return since_seq, [], []
+            # Only the last operation on each entry matters
+            last_ops = {entry_id: op for _, op, entry_id in changes}
+            deleted_ids = [entry_id for entry_id, op in last_ops.items() if op == 'delete']
+            changed_ids = [entry_id for entry_id, op in last_ops.items() if op != 'delete']
+            changed = self._entry_summaries(self.db.get_entries_by_ids(changed_ids)) if changed_ids else []
+        except Exception:
+            # Otherwise the next poll would skip the changes that failed to load
+            self.db.reset_change_marker()
+            raise
+        return changes[-1][0], changed, deleted_ids
+
+    def _backfill_metadata(self, batch_size: int = MIGRATION_BATCH_SIZE, progress=None) -> int:
+        """
+        Store encrypted metadata for entries written before it was kept
+        separately, so listing stops decrypting their passwords.
+        progress(done, total) is called after each batch.
+        Returns the number of entries updated.
+        """
+        done = 0
+        total = self.db.count_entries_without_metadata() if progress else None
+        while True:
+            batch = self.db.get_entries_without_metadata(batch_size)
+            if not batch:
+                break
+            metadata = []
+            for decrypted in self.encryption_manager.decrypt_many(
+                ((db_entry['record'], db_entry['service'].encode()) for db_entry in batch),
+                workers=self.get_decrypt_workers()
+            ):
+                decrypted_ba = bytearray(decrypted)
+                try:
+                    metadata.append(self._metadata_from_record(decrypted_ba))
+                finally:
+                    zeroize1(decrypted_ba)
+                    del decrypted_ba
+            try:
+                records = self.encryption_manager.encrypt_records(
+                    zip(metadata, (self._meta_context(db_entry['service']) for db_entry in batch))
+                )
+            finally:
+                for meta_ba in metadata:
+                    zeroize1(meta_ba)
+                del metadata
+            self.db.set_metadata(zip((db_entry['id'] for db_entry in batch), records))
+            done += len(batch)
+            if progress:
+                progress(done, total)
+        if done:
+            logging.info(f"Stored separate metadata for {done} entries")
+        return done
+
+    def _backfill_blind_indexes(self, batch_size: int = MIGRATION_BATCH_SIZE, progress=None) -> int:
+        """
+        Compute blind indexes for entries written before they existed.
+        Needs the index key, so sessions without one skip it.
+        progress(done, total) is called after each batch.
+        Returns the number of entries updated.
+        """
+        if self.index_key is None:
+            return 0
+        done = 0
+        total = self.db.count_entries_without_index() if progress else None
+        while True:
+            batch = self.db.get_entries_without_index(batch_size)
+            if not batch:
+                break
+            indexes = []
+            for db_entry, summary in zip(batch, self._entry_summaries(batch)):
+                indexes.append((db_entry['id'], *self._blind_indexes(summary['service'], summary['username'])))
+            self.db.set_blind_indexes(indexes)
+            done += len(batch)
+            if progress:
+                progress(done, total)
+        if done:
+            logging.info(f"Stored blind indexes for {done} entries")
+        return done
+
+    def _backfill_search_index(self, batch_size: int = MIGRATION_BATCH_SIZE, progress=None) -> int:
+        """
+        Add entries written before the full-text index existed to it.
+        progress(done, total) is called after each batch.
+        Returns the number of entries indexed.
+        """
+        done = 0
+        total = self.db.count_entries_without_search() if progress else None
+        while True:
+            batch = self.db.get_entries_without_search(batch_size)
+            if not batch:
+                break
+            self.db.set_search_entries(
+                (summary['id'], self._search_values(summary, summary['tags']))
+                for summary in self._entry_summaries(batch)
             )
-            decrypted_ba = bytearray(decrypted)
+            done += len(batch)
+            if progress:
+                progress(done, total)
+        if done:
+            logging.info(f"Indexed {done} entries for search")
+        return done
+
+    def _reencrypt_batches(self, reader: HybridEncryptionManager, writer: HybridEncryptionManager,
+                           algorithm_mechanism: str, after_id: str = None, checkpoint_key: str = None,
+                           progress=None, batch_size: int = MIGRATION_BATCH_SIZE,
+                           index_key: bytes = None) -> int:
+        """
+        Stream entries in id order, decrypt each batch with reader and write it
+        back encrypted by writer using one executemany per batch. Each batch is
+        its own transaction (unless the caller holds an outer one) and, with
+        checkpoint_key, records the last id written so the scan can resume.
+        Entries without metadata get it built from their full record, and
+        blind indexes are rewritten with index_key (default: the vault's).
+        Returns the number of entries re-encrypted.
+        """
+        total = self.db.count_entries()
+        done = total - self.db.count_entries(after_id) if after_id else 0
+        while True:
+            batch = self.db.get_entries_after(after_id, batch_size)
+            if not batch:
+                break
+            contexts = [db_entry['service'].encode() for db_entry in batch]
+            meta_contexts = [self._meta_context(db_entry['service']) for db_entry in batch]
+            with_metadata = [db_entry for db_entry in batch if db_entry['metadata'] is not None]
+            decrypted = [
+                bytearray(plaintext) for plaintext in reader.decrypt_many(
+                    list(zip((db_entry['record'] for db_entry in batch), contexts)) +
+                    [(db_entry['metadata'], self._meta_context(db_entry['service']))
+                     for db_entry in with_metadata],
+                    workers=self.get_decrypt_workers()
+                )
+            ]
+            plaintexts = decrypted[:len(batch)]
+            stored_metadata = iter(decrypted[len(batch):])
+            metadata = [
+                next(stored_metadata) if db_entry['metadata'] is not None
+                else self._metadata_from_record(plaintext)
+                for db_entry, plaintext in zip(batch, plaintexts)
+            ]
+            indexes = [
+                self._blind_indexes(db_entry['service'], decode_field(plaintext, 'username'), index_key)
+                for db_entry, plaintext in zip(batch, plaintexts)
+            ]
             try:
-                parts = decrypted_ba.decode().split('|', 3)
-                user_entries.append({
-                    'id': db_entry['id'],
-                    'service': db_entry['service'],
-                    'username': parts[1],
-                    'notes': parts[3] if len(parts) > 3 else ""
-                })
+                records = writer.encrypt_records(zip(plaintexts + metadata, contexts + meta_contexts))
             finally:
-                zeroize1(decrypted_ba)
-                del decrypted_ba
-        return user_entries
-    
+                for plaintext_ba in decrypted + metadata:
+                    zeroize1(plaintext_ba)
+                del plaintexts, decrypted, metadata
+            after_id = batch[-1]['id']
+            with self.db.transaction():
+                self.db.update_entries(
+                    (db_entry['id'], record, algorithm_mechanism, meta_record, *index)
+                    for db_entry, record, meta_record, index in zip(batch, records, records[len(batch):], indexes)
+                )
+                if checkpoint_key:
+                    self.db.set_config(checkpoint_key, after_id)
+            done += len(batch)
+            if progress:
+                progress(done, total)
+        return done
+
     def update_entry(self, entry_id: str, service: str = None, username: str = None, 
-                    password: str = None, notes: str = None) -> bool:
+                    password: str = None, notes: str = None, tags: list = None) -> bool:
         if self.locked:
             raise RuntimeError("Vault is locked")
         entry = self.get_entry_details(entry_id)
@@ -218,24 +701,25 @@ class PasswordVault:
         new_username = username or entry['username']
         new_password = password or entry['password']
         new_notes = notes or entry['notes']
-        new_plaintext = f"{new_service}|{new_username}|{new_password}|{new_notes}".encode()
-        new_plaintext_ba = bytearray(new_plaintext)
-        try:
-            new_encrypted = self.encryption_manager.encrypt(
-                new_plaintext_ba,
-                new_service.encode()
-            )
-            self.db.update_entry(
-                entry_id,
-                new_encrypted,
-                context=new_service,
-                algorithm_mechanism=self.algorithm_mech
-            )
-            logging.info(f"Updated entry: {entry_id}")
-            return True
-        finally:
-            zeroize1(new_plaintext_ba)
-            del new_plaintext_ba
+        new_tags = tags if tags is not None else entry['tags']
+        new_values = {
+            'service': new_service, 'username': new_username,
+            'password': new_password, 'notes': new_notes
+        }
+        new_record, new_metadata = self._encrypt_entry(new_values, new_tags)
+        service_idx, username_idx = self._blind_indexes(new_service, new_username)
+        self.db.update_entry(
+            entry_id,
+            new_record,
+            context=new_service,
+            algorithm_mechanism=self.algorithm_mech,
+            metadata=new_metadata,
+            service_idx=service_idx,
+            username_idx=username_idx,
+            search=self._search_values(new_values, new_tags)
+        )
+        logging.info(f"Updated entry: {entry_id}")
+        return True
 
     def delete_entry(self, entry_id: str):
         if self.locked:
@@ -247,104 +731,219 @@ class PasswordVault:
         if self.master_password_ba:
             zeroize1(self.master_password_ba)
             self.master_password_ba = bytearray()
+        if self.key_deriver:
             self.key_deriver.clear_sensitive_data()
+            self.key_deriver = None
+        if getattr(self, 'encryption_manager', None):
+            self.encryption_manager.clear_keys()
+        self.index_key = None
+        self.session_key = None
         self.db.close()
         self.locked = True
         logging.info("Vault locked")
 
-    def change_master_password(self, new_password: str):
+    def change_master_password(self, new_password: str, current_password: str = None,
+                               kdf_params: dict = None):
+        """
+        Change the master password. In envelope mode only the vault data key
+        is rewrapped; legacy vaults are re-encrypted once under a new data key
+        and switched to envelope mode. current_password is needed when the
+        vault was opened from keyring keys (CLI) rather than with a password.
+        kdf_params replaces the vault's KDF settings (see change_kdf).
+        An interrupted change is completed or rolled back at the next unlock
+        with a password.
+        """
         if self.locked:
             raise RuntimeError("Vault is locked")
 
-        #Fetch all entries
-        all_entries = []
-        for entry_meta in self.db.get_all_entries():
-            entry = self.get_entry_details(entry_meta['id'])
-            if entry:
-                all_entries.append(entry)
+        current_key_deriver = self.key_deriver
+        if current_key_deriver is None:
+            if not current_password:
+                raise ValueError("Current master password is required to change it")
+            current_key_deriver = KeyDerivation(current_password, self.salt, kdf_params=self.kdf_params)
 
         #Generate new salt and db key
         new_salt = os.urandom(16)
-        new_key_deriver = KeyDerivation(new_password, new_salt)
+        new_kdf_params = kdf_params or self.kdf_params
+        new_key_deriver = KeyDerivation(new_password, new_salt, kdf_params=new_kdf_params)
         new_db_key = new_key_deriver.get_database_key()
 
-        #Create new encryption manager
-        new_encryption_manager = HybridEncryptionManager(
-            new_password,
-            new_salt,
-            self.algorithm_mech
-        )
+        #Legacy vaults are moved onto a data key under the current password first
+        if not self.is_envelope_mode():
+            self._migrate_to_envelope(current_key_deriver)
 
-        #Update salt file on disk
-        with open(self.salt_path, "wb") as f:
-            f.write(new_salt)
+        #Rewrap the data key; entries stay untouched
+        data_key = self._unwrap_data_key(current_key_deriver)
+        wrapped_key = new_key_deriver.wrap_data_key(data_key)
+        zeroize1(data_key)
 
-        #Re-encrypt all entries
-        for entry in all_entries:
-            plaintext = f"{entry['service']}|{entry['username']}|{entry['password']}|{entry['notes']}".encode()
-            plaintext_ba = bytearray(plaintext)
-            try:
-                new_encrypted_data = new_encryption_manager.encrypt(
-                    plaintext_ba,
-                    entry['service'].encode()
-                )
-                self.db.update_entry(
-                    entry['id'],
-                    new_encrypted_data,
-                    context=entry['service'],
-                    algorithm_mechanism=self.algorithm_mech
-                )
-            finally:
-                zeroize1(plaintext_ba)
-                del plaintext_ba
-
-        self.db.change_db_key(new_db_key)
+        #Stage the new header and wrapped key; the current ones stay in use
+        #until the rekey, so a crash at any point leaves one password working
+        pending_path = self.salt_path + PENDING_HEADER_SUFFIX
+        write_vault_header(pending_path, new_salt, new_kdf_params)
+        self.db.set_configs({"pending_wrapped_data_key": base64.b64encode(wrapped_key).decode(),
+                             "pending_key_check": new_key_deriver.get_key_check().hex()})
+        try:
+            self.db.change_db_key(new_db_key)
+        except Exception:
+            self._discard_key_change(pending_path)
+            raise
+        self.db_key = new_db_key
+        self.salt = new_salt
+        self.kdf_params = new_kdf_params
+        self.key_deriver = new_key_deriver
+        self._finish_key_change(pending_path)
         logging.info("Master password changed successfully")
 
-    def change_algorithm(self, new_algorithm_mech: str):
+    def change_kdf(self, kdf_params: dict, master_password: str):
+        """Re-derive the vault keys with new KDF parameters, keeping the same password"""
+        self.change_master_password(master_password, current_password=master_password, kdf_params=kdf_params)
+        logging.info(f"Vault KDF changed to {kdf_params.get('kdf')}")
+
+    def enable_envelope_mode(self, current_password: str = None):
+        """
+        Migrate a legacy vault to envelope mode in place, keeping the current
+        master password. Entries are re-encrypted once under a new data key.
+        """
+        if self.locked:
+            raise RuntimeError("Vault is locked")
+        if self.is_envelope_mode():
+            return
+        key_deriver = self.key_deriver
+        if key_deriver is None:
+            if not current_password:
+                raise ValueError("Master password is required to enable envelope mode")
+            key_deriver = KeyDerivation(current_password, self.salt, kdf_params=self.kdf_params)
+        self._migrate_to_envelope(key_deriver)
+
+    def _migrate_to_envelope(self, key_deriver: KeyDerivation):
+        """Re-encrypt all entries under a new data key wrapped by key_deriver, atomically"""
+        data_key = os.urandom(32)
+        entry_key_deriver = KeyDerivation.from_master_key(data_key)
+        aes_key = entry_key_deriver.get_aes_key()
+        chacha_key = entry_key_deriver.get_chacha_key()
+        index_key = entry_key_deriver.get_index_key()
+        encryption_manager = HybridEncryptionManager.from_keys(
+            aes_key=aes_key,
+            chacha_key=chacha_key,
+            algorithm=self.algorithm_mech
+        )
+        wrapped_key = key_deriver.wrap_data_key(data_key)
+        with self.db.transaction():
+            count = self._reencrypt_batches(self.encryption_manager, encryption_manager, self.algorithm_mech,
+                                            index_key=index_key)
+            self.db.set_config("wrapped_data_key", base64.b64encode(wrapped_key).decode())
+            self.db.set_config("key_mode", "envelope")
+        self.encryption_manager = encryption_manager
+        self.index_key = index_key
+        self._store_entry_keys(aes_key, chacha_key, index_key)
+        zeroize1(data_key)
+        logging.info(f"Vault migrated to envelope encryption ({count} entries re-encrypted)")
+
+    def change_algorithm(self, new_algorithm_mech: str, progress=None,
+                         batch_size: int = MIGRATION_BATCH_SIZE):
+        """
+        Re-encrypt every entry with a new algorithm mechanism as a streaming,
+        batched migration. The last migrated id is checkpointed in vault_config
+        with each batch, so an interrupted run resumes where it stopped (also
+        automatically on the next unlock). progress(done, total) is called
+        after every batch.
+        """
         if self.locked:
             raise RuntimeError("Vault is locked")
         if new_algorithm_mech not in ["aes", "chacha", "hybrid"]:
             raise ValueError("Invalid algorithm. Valid options: aes, chacha, hybrid")
-        all_entries = []
-        for entry_meta in self.db.get_all_entries():
-            entry = self.get_entry_details(entry_meta['id'])
-            if entry:
-                all_entries.append(entry)
-        
+
         old_algo_mech = self.get_config("algorithm_mechanism")
+        after_id = None
+        if self.db.get_config("algo_migration_target") == new_algorithm_mech:
+            after_id = self.db.get_config("algo_migration_cursor") or None
+            logging.info(f"Resuming algorithm migration to {new_algorithm_mech} after entry {after_id}")
+        else:
+            with self.db.transaction():
+                self.db.set_config("algo_migration_target", new_algorithm_mech)
+                self.db.delete_config("algo_migration_cursor")
+
+        encryption_manager = HybridEncryptionManager.from_keys(
+            aes_key=self.encryption_manager.aes_cipher.key,
+            chacha_key=self.encryption_manager.chacha_cipher.key,
+            algorithm=new_algorithm_mech
+        )
+        # Mid-migration the vault holds both algorithms, so read without prefix restrictions
+        reader = HybridEncryptionManager.from_keys(
+            aes_key=self.encryption_manager.aes_cipher.key,
+            chacha_key=self.encryption_manager.chacha_cipher.key,
+            algorithm="hybrid"
+        )
+        count = self._reencrypt_batches(
+            reader, encryption_manager, new_algorithm_mech,
+            after_id=after_id,
+            checkpoint_key="algo_migration_cursor",
+            progress=progress,
+            batch_size=batch_size
+        )
+
         if new_algorithm_mech == "aes":
             self.algorithm = "AES"
         elif new_algorithm_mech == "chacha":
             self.algorithm = "CHA"
         else:
-            if self.encryption_manager.has_aes_ni():
+            if encryption_manager.prefers_aes():
                 self.algorithm = "AES"
             else:
                 self.algorithm = "CHA"
-        self.db.set_config("algorithm",  self.algorithm)
-        self.db.set_config("algorithm_mechanism", new_algorithm_mech)
-        aes_key = base64.b64decode(keyring.get_password("aes_key", "aes_key"))
-        chacha_key = base64.b64decode(keyring.get_password("chacha_key", "chacha_key"))
-        encryption_manager = HybridEncryptionManager.from_keys(aes_key=aes_key, chacha_key=chacha_key, algorithm=new_algorithm_mech)
-        for entry in all_entries:
-            plaintext = f"{entry['service']}|{entry['username']}|{entry['password']}|{entry['notes']}".encode()
-            plaintext_ba = bytearray(plaintext)
-            try:
-                encrypted_data = encryption_manager.encrypt(
-                    plaintext_ba,
-                    entry['service'].encode()
-                )
-                self.db.update_entry(
-                    entry['id'],
-                    encrypted_data,
-                    context=entry['service'],
-                    algorithm_mechanism=new_algorithm_mech
-                )
-            finally:
-                zeroize1(plaintext_ba)
-                del plaintext_ba
-        logging.info(f"Algorithm changed from {old_algo_mech} to {new_algorithm_mech}. All entries re-encrypted.")
+        with self.db.transaction():
+            self.db.set_config("algorithm",  self.algorithm)
+            self.db.set_config("algorithm_mechanism", new_algorithm_mech)
+            self.db.delete_config("algo_migration_target")
+            self.db.delete_config("algo_migration_cursor")
+        self.algorithm_mech = new_algorithm_mech
+        self.encryption_manager = encryption_manager
+        logging.info(f"Algorithm changed from {old_algo_mech} to {new_algorithm_mech}. {count} entries re-encrypted.")
+
+    def maintain(self, max_pages: int = MAINTENANCE_SLICE_PAGES, checkpoint: str = "PASSIVE",
+                 convert: bool = False) -> dict:
+        """
+        Run one bounded maintenance slice: return up to max_pages free pages
+        to the filesystem with incremental_vacuum, then checkpoint the WAL.
+        Files created without auto_vacuum cannot vacuum incrementally; with
+        convert they are rebuilt once by a full VACUUM (not bounded),
+        otherwise the report sets 'needs_conversion'.
+        Old change-journal rows are pruned first so their pages can be reclaimed.
+        Returns a report of pages reclaimed, free pages left and WAL frames.
+        """
+        if self.locked:
+            raise RuntimeError("Vault is locked")
+        pruned_changes = self.db.prune_changes()
+        stats = self.db.maintenance_stats()
+        report = {
+            'pruned_changes': pruned_changes,
+            'freelist_before': stats['freelist_count'],
+            'reclaimed_pages': 0,
+            'converted': False,
+            'needs_conversion': False,
+        }
+        if stats['auto_vacuum'] != 'incremental':
+            if convert:
+                self.db.enable_incremental_vacuum()
+                report['converted'] = True
+                # The rebuilt file gains pointer-map pages, so it can come out larger
+                report['reclaimed_pages'] = max(0, stats['page_count'] - self.db.maintenance_stats()['page_count'])
+                logging.info("Vault database rebuilt with incremental auto-vacuum")
+            else:
+                report['needs_conversion'] = True
+        elif stats['freelist_count']:
+            report['reclaimed_pages'] = self.db.incremental_vacuum(max_pages)
+        busy, wal_frames, checkpointed_frames = self.db.wal_checkpoint(checkpoint)
+        stats = self.db.maintenance_stats()
+        report.update({
+            'page_count': stats['page_count'],
+            'freelist_after': stats['freelist_count'],
+            'wal_frames': wal_frames,
+            'checkpointed_frames': checkpointed_frames,
+            'checkpoint_busy': bool(busy),
+        })
+        return report
 
     def export_backup(self, backup_path: str):
         # Ensure destination folder exists
@@ -354,9 +953,8 @@ class PasswordVault:
 
     def close(self):
         self.lock()
-        keyring.delete_password("database_key", "db_key")
-        keyring.delete_password("aes_key", "aes_key")
-        keyring.delete_password("chacha_key", "chacha_key")
+        clear_session_keys()
+        SessionStore(self.db_path).clear()
         logging.info("Vault closed securely")
 
     def __enter__(self):
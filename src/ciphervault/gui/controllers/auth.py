@@ -1,7 +1,7 @@
 import os
-import datetime
 import pyotp
 from ciphervault.core.vault import PasswordVault
+from ciphervault.core.session import SessionStore, DEFAULT_SESSION_TIMEOUT
 from ciphervault.core.utils import resolve_vault_path
 
 class AuthController:
@@ -21,8 +21,8 @@ class AuthController:
 
         try:
             vault = PasswordVault(master_password, db_path=db_path)
-            now = datetime.datetime.utcnow()
-            vault.db.set_config("last_used", now.isoformat())
+            timeout_str = vault.get_config("session_timeout")
+            SessionStore(db_path, vault.session_key).start(int(timeout_str) if timeout_str else DEFAULT_SESSION_TIMEOUT)
 
             return True, "Login successful!", vault
 
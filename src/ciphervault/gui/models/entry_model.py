@@ -18,6 +18,40 @@ class EntryModel(QAbstractTableModel):
             self.all_entries = entries.copy()
         self.endResetModel()
 
+    def append(self, entries: list[dict], store_all=True):
+        """Add a page of entries at the end without resetting the view"""
+        if not entries:
+            return
+        first = len(self._entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        self._entries.extend(entries)
+        if store_all:
+            self.all_entries.extend(entries)
+        self.endInsertRows()
+
+    def apply_changes(self, changed: list[dict], deleted_ids: list[str]):
+        """Update, add and remove rows by entry id without resetting the view"""
+        deleted_ids = set(deleted_ids)
+        changed_by_id = {entry["id"]: entry for entry in changed}
+        known_ids = {entry["id"] for entry in self.all_entries}
+        self.all_entries = [
+            changed_by_id.get(entry["id"], entry)
+            for entry in self.all_entries if entry["id"] not in deleted_ids
+        ]
+        added = [entry for entry_id, entry in changed_by_id.items() if entry_id not in known_ids]
+        self.all_entries.extend(added)
+
+        for row in reversed(range(len(self._entries))):
+            entry_id = self._entries[row]["id"]
+            if entry_id in deleted_ids:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._entries[row]
+                self.endRemoveRows()
+            elif entry_id in changed_by_id:
+                self._entries[row] = changed_by_id[entry_id]
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+        self.append(added, store_all=False)
+
     def rowCount(self, parent=QModelIndex()):
         return len(self._entries)
 
@@ -12,4 +12,11 @@ EDIT_ICON     = resource_path('assets/icons/edit.svg')
 CLOSE_ICON    = resource_path('assets/icons/close.svg')
 EXIT_ICON     = resource_path('assets/icons/exit.svg')
 IMPORT_ICON   = resource_path('assets/icons/import.svg')
-EXPORT_ICON   = resource_path('assets/icons/export.svg')
\ No newline at end of file
+EXPORT_ICON   = resource_path('assets/icons/export.svg')
+
+# Idle time before a database maintenance slice runs, and the gap between
+# slices while free pages remain and the user stays idle
+MAINTENANCE_IDLE_MS           = 30_000
+MAINTENANCE_SLICE_INTERVAL_MS = 500
+# How often the vault list checks for changes made elsewhere (e.g. the CLI)
+CHANGE_POLL_INTERVAL_MS       = 2_000
@@ -344,18 +344,21 @@ class InitWindow(QWidget):
 
         try:
             vault = PasswordVault(password, db_path=db_path)
-            vault.db.set_config("vault_name", vault_name)
-            vault.db.set_config("encryption_mode", encryption_mode)
-            vault.db.set_config("username", username)
-            vault.db.set_config("email", email)
-            vault.db.set_config("clipboard_timeout", "30")
-            vault.db.set_config("session_timeout", "5")
-            vault.db.set_config("breach_chk_enabled", "true")
+            settings = {
+                "vault_name": vault_name,
+                "encryption_mode": encryption_mode,
+                "username": username,
+                "email": email,
+                "clipboard_timeout": "30",
+                "session_timeout": "5",
+                "breach_chk_enabled": "true",
+            }
             if self.totp_secret:
-                vault.db.set_config("totp_secret", self.totp_secret)
-                vault.db.set_config("totp_enabled", "true")
+                settings["totp_secret"] = self.totp_secret
+                settings["totp_enabled"] = "true"
             else:
-                vault.db.set_config("totp_enabled", "false")
+                settings["totp_enabled"] = "false"
+            vault.db.set_configs(settings)
 
             PopupDialog("Success", f"Vault '{vault_name}' created successfully!").exec()
             self.create_button.setFocus()
@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTableView, QPushButton,
     QLineEdit, QTextEdit, QLabel, QSizePolicy, QHeaderView,
-    QGraphicsDropShadowEffect, QStackedWidget, QButtonGroup, QMenu
+    QGraphicsDropShadowEffect, QStackedWidget, QButtonGroup, QMenu, QApplication
 )
 from PyQt6.QtGui import QIcon, QColor, QFontMetrics, QPalette, QPixmap, QBrush, QAction
 from PyQt6.QtCore import Qt, QPoint, QTimer, QEvent
@@ -12,7 +12,9 @@ from ciphervault.gui.views.popup_dialog import PopupDialog
 from ciphervault.gui.widgets.strength_meter import PasswordStrengthBar
 from ciphervault.gui.views.entry_dialog import EntryDialog
 from ciphervault.gui.widgets.blended_logo import BlendedLogo
-from ciphervault.gui.utils.settings import LOGO_PATH, BG_PATH
+from ciphervault.gui.utils.settings import (
+    LOGO_PATH, BG_PATH, MAINTENANCE_IDLE_MS, MAINTENANCE_SLICE_INTERVAL_MS, CHANGE_POLL_INTERVAL_MS
+)
 from ciphervault.gui.utils.styles import DASHBOARD, BREACH_TAB
 
 from ciphervault.core.utils import copy_clipboard
@@ -32,6 +34,8 @@ class MainWindow(QMainWindow):
         self.vaultname = vaultname
         self._current_password = None
         self._password_visible = False
+        # Set while the settings page re-encrypts the vault
+        self._background_paused = False
         # Background
         self.setAutoFillBackground(True)
         palette = QPalette()
@@ -318,6 +322,8 @@ class MainWindow(QMainWindow):
         
         # Profile page
         self.profile_page = SettingsPage(self.controller, self.vaultname)
+        self.profile_page.algorithm_change_started.connect(self._pause_background_work)
+        self.profile_page.algorithm_change_finished.connect(self._resume_background_work)
 
         # --- Stacked Pages ---
         self.stacked_pages = QStackedWidget()
@@ -423,6 +429,16 @@ class MainWindow(QMainWindow):
         self.session_timer.setInterval(self.session_timeout_minutes * 60 * 1000)
         self.session_timer.timeout.connect(self._on_session_timeout)
         self.session_timer.start()
+        # Database maintenance runs in small slices while the user is idle
+        self.maintenance_timer = QTimer()
+        self.maintenance_timer.setSingleShot(True)
+        self.maintenance_timer.timeout.connect(self._run_maintenance_slice)
+        self.maintenance_timer.start(MAINTENANCE_IDLE_MS)
+        # Pick up entries changed by other processes (e.g. the CLI)
+        self.change_timer = QTimer()
+        self.change_timer.setInterval(CHANGE_POLL_INTERVAL_MS)
+        self.change_timer.timeout.connect(self._refresh_changes)
+        self.change_timer.start()
         # Capture user events to reset timer
         self.installEventFilter(self)
         
@@ -463,10 +479,37 @@ class MainWindow(QMainWindow):
             self.table.setColumnWidth(col, max_width + padding)
 
     def _load_entries(self):
-        entries = self.controller.list_entries()
-        self.model.update(entries, store_all=True)
+        # Taken first: changes made while loading are applied again by the next refresh
+        self.change_seq = self.controller.change_seq()
+        self.model.update([], store_all=True)
+        for page in self.controller.iter_entry_pages():
+            self.model.append(page)
+            self.statusBar().showMessage(f"{self.model.rowCount()} entries loaded...")
+            QApplication.processEvents()
+        self._resize_columns_to_cell_content()
+        self.statusBar().showMessage(f"{self.model.rowCount()} entries loaded.")
+
+    def _refresh_changes(self):
+        """Apply entries added, updated or deleted since the last load or refresh"""
+        try:
+            changes = self.controller.poll_changes(self.change_seq)
+            if changes is None:
+                # The change journal was pruned past our position
+                self._load_entries()
+                return
+        except Exception as e:
+            # Another process may hold the write lock or be rekeying the
+            # vault; the next tick tries again
+            self.statusBar().showMessage(f"Refresh skipped: {e}", 3000)
+            return
+        self.change_seq, changed, deleted_ids = changes
+        if not changed and not deleted_ids:
+            return
+        self.model.apply_changes(changed, deleted_ids)
+        if self.search.text():
+            self._filter_vault_entries(self.search.text())
         self._resize_columns_to_cell_content()
-        self.statusBar().showMessage(f"{len(entries)} entries loaded.")
+        self.statusBar().showMessage(f"{len(self.model.all_entries)} entries loaded.")
 
     def _filter_entries(self, text):
         if self.stacked_pages.currentIndex() == 0:
@@ -512,7 +555,7 @@ class MainWindow(QMainWindow):
         dlg = EntryDialog(title="Add Entry", message="Enter new entry details")
         if dlg.exec():
             self.controller.add_password_entry(**dlg.get_data())
-            self._load_entries()
+            self._refresh_changes()
             PopupDialog("New Entry Added", "Entry added successfully.")
 
     def _toggle_edit_mode(self):
@@ -545,7 +588,7 @@ class MainWindow(QMainWindow):
                     notes=self.notes_field.toPlainText()
                 )
                 PopupDialog("Updated", "Entry updated successfully.")
-                self._load_entries()
+                self._refresh_changes()
                 index = self.model.index(0, 0)
                 for row in range(self.model.rowCount()):
                     entry = self.model.data(self.model.index(row, 0), Qt.ItemDataRole.UserRole)
@@ -596,7 +639,7 @@ class MainWindow(QMainWindow):
         if eid is None:
             return
         self.controller.delete_entry(eid)
-        self._load_entries()
+        self._refresh_changes()
         self.detail_panel.hide()
         PopupDialog("Deleted", "Entry deleted.")
 
@@ -665,10 +708,9 @@ class MainWindow(QMainWindow):
             self.breach_stack.setCurrentWidget(self.breach_placeholder)
             return
 
-        entries = self.controller.list_entries()
         results = []
 
-        for e in entries:
+        for e in self.controller.iter_entries():
             pwd = self.controller.get_entry_details(e["id"]).get("password", "")
             status = is_password_breached(pwd)
             results.append({
@@ -684,10 +726,8 @@ class MainWindow(QMainWindow):
 
     def _toggle_breach_filter(self):
         breached_only = self.filter_breached_btn.isChecked()
-        all_entries = self.controller.list_entries()
-
         results = []
-        for e in all_entries:
+        for e in self.controller.iter_entries():
             pwd = self.controller.get_entry_details(e["id"]).get("password", "")
             status = is_password_breached(pwd)
             if breached_only and not status:
@@ -813,8 +853,33 @@ class MainWindow(QMainWindow):
                             QEvent.Type.KeyPress,
                             QEvent.Type.MouseMove):
             self.session_timer.start()
+            if not self._background_paused:
+                self.maintenance_timer.start(MAINTENANCE_IDLE_MS)
         return super().eventFilter(obj, event)
 
+    def _pause_background_work(self):
+        """Stop the timers that read the vault while its entries are re-encrypted"""
+        self._background_paused = True
+        self.change_timer.stop()
+        self.maintenance_timer.stop()
+
+    def _resume_background_work(self):
+        self._background_paused = False
+        self.change_timer.start()
+        self.maintenance_timer.start(MAINTENANCE_IDLE_MS)
+
+    def _run_maintenance_slice(self):
+        try:
+            report = self.controller.maintain()
+        except Exception as e:
+            # Background work: report quietly instead of interrupting the user
+            self.statusBar().showMessage(f"Maintenance skipped: {e}", 3000)
+            return
+        if report['reclaimed_pages']:
+            self.statusBar().showMessage(f"Maintenance reclaimed {report['reclaimed_pages']} page(s).", 3000)
+        if report['reclaimed_pages'] and report['freelist_after']:
+            self.maintenance_timer.start(MAINTENANCE_SLICE_INTERVAL_MS)
+
     def _on_session_timeout(self):
         popup = PopupDialog(
             "Session Timeout",
@@ -826,6 +891,8 @@ class MainWindow(QMainWindow):
         self.logout()
 
     def logout(self):
+        self.change_timer.stop()
+        self.maintenance_timer.stop()
         self.close()
         from ciphervault.gui.views.login_window import LoginWindow
         self.login_window = LoginWindow()
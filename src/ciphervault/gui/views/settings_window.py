@@ -1,8 +1,9 @@
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QSlider, QCheckBox,
-    QGroupBox, QLineEdit, QComboBox, QDialog, QFormLayout, QSizePolicy, QFileDialog, QInputDialog, QDialogButtonBox, QListWidgetItem, QListWidget
+    QGroupBox, QLineEdit, QComboBox, QDialog, QFormLayout, QSizePolicy, QFileDialog, QInputDialog, QDialogButtonBox, QListWidgetItem, QListWidget,
+    QProgressDialog, QApplication
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QPixmap
 
 from ciphervault.gui.utils.settings import USER_ICON
@@ -17,6 +18,10 @@ from ciphervault.core.utils import get_vaults_dir
 import os, shutil
 
 class SettingsPage(QWidget):
+    # The main window pauses its vault polling and maintenance in between
+    algorithm_change_started = pyqtSignal()
+    algorithm_change_finished = pyqtSignal()
+
     def __init__(self, controller, vaultname):
         super().__init__()
         self.controller = controller
@@ -212,20 +217,21 @@ class SettingsPage(QWidget):
                     self.session_time.setText(f"{self.session_slider.value()} m")
                     return
             if encryption_changed:
-                self.controller.change_algorithm(new_settings["algorithm_mechanism"])
+                self._change_algorithm_with_progress(new_settings["algorithm_mechanism"])
                 self.encryption_dropdown.blockSignals(True)
                 self.encryption_dropdown.setCurrentText(new_settings["algorithm_mechanism"])
                 self.encryption_dropdown.blockSignals(False)
 
+            updates = {}
             if totp_enabled_prev != new_settings["totp_enabled"]:
-                self.controller.update_config("totp_enabled", new_settings["totp_enabled"])
+                updates["totp_enabled"] = new_settings["totp_enabled"]
             if new_settings["totp_enabled"] == "true" and not self.controller.get_config("totp_secret"):
                 self.totp_secret = None
                 dialog = TOTPDialog(self.vaultname, parent=self)
                 if dialog.exec():
                     if dialog.success:
                         self.totp_secret = dialog.secret
-                        self.controller.update_config("totp_secret", self.totp_secret)
+                        updates["totp_secret"] = self.totp_secret
                     else:
                         self.controller.update_config("totp_enabled", "false")
                         self.totp_toggle.setChecked(False)
@@ -238,16 +244,35 @@ class SettingsPage(QWidget):
                     return
 
             if breach_check_prev != new_settings["breach_chk_enabled"]:
-                self.controller.update_config("breach_chk_enabled", new_settings["breach_chk_enabled"])
-
-            self.controller.update_config("session_timeout", new_settings["session_timeout"])
+                updates["breach_chk_enabled"] = new_settings["breach_chk_enabled"]
 
-            self.controller.update_config("clipboard_timeout", new_settings["clipboard_timeout"])
+            updates["session_timeout"] = new_settings["session_timeout"]
+            updates["clipboard_timeout"] = new_settings["clipboard_timeout"]
+            self.controller.update_configs(updates)
 
             PopupDialog("Settings Updated", "Settings have been saved.", "OK", parent=self).exec()
         else:
             PopupDialog("Settings", "No changes found", "OK", parent=self).exec()
 
+    def _change_algorithm_with_progress(self, new_algorithm):
+        progress = QProgressDialog("Re-encrypting vault entries...", None, 0, 100, self)
+        progress.setWindowTitle("Changing Encryption")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+
+        def report(done, total):
+            progress.setValue(int(done * 100 / total) if total else 100)
+            QApplication.processEvents()
+
+        self.algorithm_change_started.emit()
+        try:
+            self.controller.change_algorithm(new_algorithm, progress=report)
+        finally:
+            progress.setValue(100)
+            progress.close()
+            self.algorithm_change_finished.emit()
+
     def change_password(self):
         dlg = ChangePasswordDialog(self)
         if dlg.exec():